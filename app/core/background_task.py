@@ -1,23 +1,247 @@
 # app/core/background_task.py
 import asyncio
-from datetime import datetime
+import base64
+import heapq
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.services.notifications import notify_today_events
+from app.core.broadcast import broadcast, chunk_by_size, notifier_lock
+from app.core.cache import invalidate_shared_cache
+from app.core.config import (
+    NOTIFY_WINDOW_SECONDS,
+    SCHEDULER_MAX_SLEEP_SECONDS,
+    SCHEDULER_RETRY_SECONDS,
+    LEADER_RETRY_SECONDS,
+    EVENT_REMINDER_EMAILS,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.mail import mail_worker
+from app.models import Event
+from app.routes.notification_ws import manager, enrollment_manager
+from app.services.enrollment import record_progress
+from app.services.fingerprint_matcher import fingerprint_matcher
+from app.services.notifications import (
+    fan_out_event_notifications,
+    warm_notification_cache,
+    expire_notification_cache,
+)
 
+logger = logging.getLogger(__name__)
 
-async def event_notifier_loop():
-    """Background task that checks for events every 60 seconds"""
 
-    while True:
+async def _load_upcoming_events(now: datetime) -> list:
+    """
+    Returns (start_at, event_id) for every event that hasn't started yet and
+    whose window can open before the next forced reload.
+    """
+    horizon = now + timedelta(
+        seconds=SCHEDULER_MAX_SLEEP_SECONDS + NOTIFY_WINDOW_SECONDS
+    )
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(Event.id, Event.event_date, Event.start_time).where(
+                Event.event_date >= now.date(), Event.event_date <= horizon.date()
+            )
+        )
+
+    upcoming = []
+    for event_id, event_date, start_time in rows:
+        start_at = datetime.combine(event_date, start_time)
+        if start_at > now:
+            upcoming.append((start_at, event_id))
+    return upcoming
+
+
+def _notify_event(db: Session, event_id: int) -> list:
+    """
+    Fans out notifications for one event. Runs through AsyncSession.run_sync,
+    so the sync fan-out code awaits the async driver instead of blocking.
+    Returns the payloads of the rows it created.
+    """
+    created = []
+    event = db.query(Event).filter(Event.id == event_id).first()
+    if event is None:
+        return created
+    start_at = datetime.combine(event.event_date, event.start_time)
+    if not (0 < (start_at - datetime.now()).total_seconds() <= NOTIFY_WINDOW_SECONDS):
+        return created
+    # Raises on failure so the scheduler retries notifications and emails together
+    fan_out_event_notifications(
+        db, event, created=created, send_emails=EVENT_REMINDER_EMAILS
+    )
+    return created
+
+
+async def _run_sync(fn, *args):
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(fn, *args)
+
+
+class EventNotifierScheduler:
+    """
+    Keeps a min-heap of upcoming event start times and sleeps until the next
+    notification window opens, instead of polling the events table. An event
+    only counts as fired once its fan-out succeeded; failures are retried with
+    exponential backoff until the event starts.
+
+    Only the elected worker runs the loop. Routes that create, update or delete
+    events call reschedule(), which broadcasts a wake-up so the elected worker
+    reloads the heap from the database.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._fired = set()
+        # (start_at, event_id) -> (failed attempts, next attempt at)
+        self._retries = {}
+        self._loop = None
+        self._wakeup = None
+
+    def bind(self, loop):
+        self._loop = loop
+
+    def wake(self):
+        """Must be called on the event loop thread."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def reschedule(self):
+        """Thread-safe: safe to call from sync routes running in the threadpool."""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(
+            lambda: self._loop.create_task(broadcast.publish({"type": "reschedule"}))
+        )
+
+    async def _reload(self):
+        upcoming = await _load_upcoming_events(datetime.now())
+        # Forget fired windows whose event has started (or was moved/deleted)
+        still_upcoming = set(upcoming)
+        self._fired &= still_upcoming
+        self._retries = {
+            entry: retry
+            for entry, retry in self._retries.items()
+            if entry in still_upcoming
+        }
+        window = timedelta(seconds=NOTIFY_WINDOW_SECONDS)
+        # Heap entries are (fire_at, start_at, event_id)
+        heap = []
+        for start_at, event_id in upcoming:
+            entry = (start_at, event_id)
+            if entry in self._fired:
+                continue
+            retry = self._retries.get(entry)
+            fire_at = retry[1] if retry else start_at - window
+            heap.append((fire_at, start_at, event_id))
+        heapq.heapify(heap)
+        self._heap = heap
+        logger.debug(f"Scheduler loaded {len(heap)} upcoming events")
+
+    def _schedule_retry(self, start_at: datetime, event_id: int):
+        entry = (start_at, event_id)
+        attempts = self._retries.get(entry, (0, None))[0] + 1
+        retry_at = datetime.now() + timedelta(
+            seconds=SCHEDULER_RETRY_SECONDS * 2 ** (attempts - 1)
+        )
+        if retry_at >= start_at:
+            self._retries.pop(entry, None)
+            logger.error(f"Giving up on event {event_id} after {attempts} attempts")
+            return
+        self._retries[entry] = (attempts, retry_at)
+        heapq.heappush(self._heap, (retry_at, start_at, event_id))
+
+    async def _fire_due(self):
+        now = datetime.now()
+
+        while self._heap and self._heap[0][0] <= now:
+            _, start_at, event_id = heapq.heappop(self._heap)
+            if start_at <= now:
+                continue
+            try:
+                created = await _run_sync(_notify_event, event_id)
+                for items in chunk_by_size(created):
+                    await broadcast.publish({"type": "notifications", "items": items})
+            except Exception:
+                logger.exception(f"Failed to notify event {event_id}")
+                self._schedule_retry(start_at, event_id)
+                continue
+            self._fired.add((start_at, event_id))
+            self._retries.pop((start_at, event_id), None)
+
+    def _seconds_until_next_window(self) -> float:
+        if not self._heap:
+            return SCHEDULER_MAX_SLEEP_SECONDS
+        delay = (self._heap[0][0] - datetime.now()).total_seconds()
+        return min(max(delay, 0), SCHEDULER_MAX_SLEEP_SECONDS)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
         try:
-            db: Session = SessionLocal()
-            await notify_today_events(db)
-        except Exception as e:
-            import traceback
+            await _run_sync(warm_notification_cache)
+        except Exception:
+            logger.exception("Failed to warm notification cache")
+
+        while True:
+            try:
+                self._wakeup.clear()
+                await self._reload()
+                expire_notification_cache()
+                await self._fire_due()
+
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self._seconds_until_next_window()
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event notifier scheduler failed, retrying")
+                await asyncio.sleep(5)
+
+
+scheduler = EventNotifierScheduler()
+
+
+async def _relay_broadcast(message: dict):
+    """Runs in every worker: hands broadcast messages to local consumers."""
+    kind = message.get("type")
+    if kind == "notifications":
+        await manager.send_to_users((n["user_id"], n) for n in message["items"])
+    elif kind == "reschedule":
+        scheduler.wake()
+    elif kind == "cache_invalidate":
+        invalidate_shared_cache(message["cache"], message.get("key"))
+    elif kind == "enrollment":
+        progress = message["progress"]
+        record_progress(progress)
+        await enrollment_manager.send_to_users([(progress["user_id"], progress)])
+    elif kind == "fingerprint":
+        if message["action"] == "add":
+            fingerprint_matcher.add(
+                message["fingerprint_id"],
+                message["user_id"],
+                base64.b64decode(message["template"]),
+            )
+        elif message["action"] == "remove":
+            fingerprint_matcher.remove_user(message["user_id"])
+
+
+async def event_notifier_loop():
+    """
+    Background task started by every worker. Relays broadcasts to local sockets,
+    and runs the notifier scheduler and the outbox mail worker once this
+    worker wins the leader lock.
+    """
+    scheduler.bind(asyncio.get_running_loop())
+    await broadcast.start(_relay_broadcast)
 
-            traceback.print_exc()
-        finally:
-            db.close()
+    while not notifier_lock.try_acquire():
+        await asyncio.sleep(LEADER_RETRY_SECONDS)
 
-        await asyncio.sleep(60)
+    logger.info("This worker was elected to run the event notifier and mail worker")
+    await asyncio.gather(scheduler.run(), mail_worker.run())
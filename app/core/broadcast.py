@@ -0,0 +1,229 @@
+# app/core/broadcast.py
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Awaitable, Callable, Iterator, Optional
+from app.core.config import (
+    BROADCAST_BACKEND,
+    BROADCAST_MAX_BYTES,
+    BROADCAST_SOCKET_DIR,
+    NOTIFIER_LOCK_FILE,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def chunk_by_size(items: list, max_bytes: int = BROADCAST_MAX_BYTES) -> Iterator[list]:
+    """
+    Splits items into lists whose JSON encoding stays under max_bytes, leaving
+    room for the message envelope. An item too large on its own goes alone.
+    """
+    budget = max_bytes - 256
+    chunk, size = [], 0
+    for item in items:
+        item_size = len(json.dumps(item).encode("utf-8")) + 2
+        if chunk and size + item_size > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield chunk
+
+
+class BroadcastBackend:
+    """
+    Delivers JSON-serializable messages to every worker process.
+    Each worker registers one handler in start(); publish() reaches all of them,
+    including the publishing worker itself.
+    """
+
+    _loop = None
+
+    async def start(self, handler: Handler):
+        raise NotImplementedError
+
+    async def publish(self, message: dict):
+        raise NotImplementedError
+
+    def publish_soon(self, message: dict):
+        """
+        Thread-safe, fire-and-forget publish for sync routes running in the
+        threadpool. Does nothing before start().
+        """
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(
+            lambda: self._loop.create_task(self.publish(message))
+        )
+
+    async def stop(self):
+        pass
+
+
+class InProcessBroadcast(BroadcastBackend):
+    """Single-worker backend: publish calls the local handler directly."""
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+
+    async def publish(self, message: dict):
+        if self._handler is not None:
+            await self._handler(message)
+
+
+class UnixSocketBroadcast(BroadcastBackend):
+    """
+    Multi-worker backend for workers on the same host, no external services.
+
+    Every worker binds a Unix datagram socket named after its pid inside a
+    shared directory. publish() sends the message to every socket in that
+    directory; sockets of dead workers are removed when a send is refused.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._handler: Optional[Handler] = None
+        self._loop = None
+
+    async def start(self, handler: Handler):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.bind(self.path)
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._sock.recv(1 << 20)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data)
+            except ValueError:
+                logger.warning("Dropping malformed broadcast datagram")
+                continue
+            self._loop.create_task(self._dispatch(message))
+
+    async def _dispatch(self, message: dict):
+        try:
+            await self._handler(message)
+        except Exception:
+            logger.exception("Broadcast handler failed")
+
+    @staticmethod
+    async def _send(sender: socket.socket, data: bytes, target: str, retries: int = 50):
+        """Waits briefly for a full receive queue to drain before giving up."""
+        for _ in range(retries):
+            try:
+                sender.sendto(data, target)
+                return
+            except BlockingIOError:
+                await asyncio.sleep(0.01)
+        sender.sendto(data, target)
+
+    async def publish(self, message: dict):
+        data = json.dumps(message).encode("utf-8")
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            for name in os.listdir(self.directory):
+                if not name.endswith(".sock"):
+                    continue
+                target = os.path.join(self.directory, name)
+                try:
+                    await self._send(sender, data, target)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    if target != self.path:
+                        try:
+                            os.unlink(target)
+                        except FileNotFoundError:
+                            pass
+                except BlockingIOError:
+                    logger.warning(f"Broadcast queue full, dropped message for {name}")
+                except OSError as e:
+                    # e.g. EMSGSIZE; one bad datagram must not stop the others
+                    logger.error(
+                        f"Broadcast of {len(data)} bytes to {name} failed: {e}"
+                    )
+        finally:
+            sender.close()
+
+    async def stop(self):
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LeaderLock:
+    """
+    Elects one worker per host with a non-blocking flock on a shared file.
+    The OS releases the lock when the holder exits, so another worker can
+    take over on its next attempt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def create_broadcast() -> BroadcastBackend:
+    if BROADCAST_BACKEND == "memory":
+        return InProcessBroadcast()
+    if BROADCAST_BACKEND == "unix":
+        return UnixSocketBroadcast(BROADCAST_SOCKET_DIR)
+    raise ValueError(f"Unknown BROADCAST_BACKEND: {BROADCAST_BACKEND}")
+
+
+broadcast = create_broadcast()
+notifier_lock = LeaderLock(NOTIFIER_LOCK_FILE)
@@ -0,0 +1,72 @@
+# app/core/cache.py
+import threading
+import time
+from collections import OrderedDict
+from app.core.broadcast import broadcast
+
+# Named caches that every worker keeps a copy of; see invalidate_everywhere()
+_shared_caches = {}
+
+
+class TTLCache:
+    """
+    Small thread-safe in-memory cache. Entries expire after `ttl` seconds and
+    the least recently used entry is evicted once `maxsize` is reached.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, name: str = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        if name is not None:
+            _shared_caches[name] = self
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drops one key, or everything when called without a key."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_everywhere(self, key=None):
+        """
+        Drops one key (or everything) right away and broadcasts the
+        invalidation so every other worker drops it too. Keys must be JSON
+        serializable; the cache needs a name. Thread-safe.
+        """
+        self.invalidate(key)
+        broadcast.publish_soon(
+            {"type": "cache_invalidate", "cache": self.name, "key": key}
+        )
+
+
+def invalidate_shared_cache(name: str, key=None):
+    """Broadcast handler side of TTLCache.invalidate_everywhere()."""
+    cache = _shared_caches.get(name)
+    if cache is not None:
+        cache.invalidate(key)
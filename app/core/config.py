@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv()
 
@@ -8,3 +9,123 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = int(os.getenv("DB_PORT", 3306))
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
+
+# Connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+# Below MySQL's wait_timeout so idle connections are replaced, not "gone away"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Notifications
+NOTIFICATION_INSERT_CHUNK_SIZE = int(os.getenv("NOTIFICATION_INSERT_CHUNK_SIZE", 1000))
+NOTIFY_WINDOW_SECONDS = int(os.getenv("NOTIFY_WINDOW_SECONDS", 120))
+SCHEDULER_MAX_SLEEP_SECONDS = int(os.getenv("SCHEDULER_MAX_SLEEP_SECONDS", 3600))
+# A failed fan-out is retried after this, doubling each time, until the event starts
+SCHEDULER_RETRY_SECONDS = int(os.getenv("SCHEDULER_RETRY_SECONDS", 5))
+NOTIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("NOTIFICATION_CACHE_MAX_ENTRIES", 200000))
+
+# WebSockets
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", 2.0))
+
+# Multi-worker coordination
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+BROADCAST_SOCKET_DIR = os.getenv(
+    "BROADCAST_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "ara-broadcast")
+)
+# Per datagram; keep well under the socket buffer (net.core.wmem_default, 208 KiB)
+BROADCAST_MAX_BYTES = int(os.getenv("BROADCAST_MAX_BYTES", 64 * 1024))
+NOTIFIER_LOCK_FILE = os.getenv(
+    "NOTIFIER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "ara-event-notifier.lock")
+)
+LEADER_RETRY_SECONDS = int(os.getenv("LEADER_RETRY_SECONDS", 30))
+
+# Pagination
+NOTIFICATIONS_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_PAGE_SIZE", 50))
+NOTIFICATIONS_MAX_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_MAX_PAGE_SIZE", 200))
+NOTIFICATIONS_MAX_BULK_IDS = int(os.getenv("NOTIFICATIONS_MAX_BULK_IDS", 1000))
+ROSTER_PAGE_SIZE = int(os.getenv("ROSTER_PAGE_SIZE", 50))
+ROSTER_MAX_PAGE_SIZE = int(os.getenv("ROSTER_MAX_PAGE_SIZE", 500))
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", 50))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", 200))
+
+# Caching
+PROGRAM_COUNTS_CACHE_TTL = int(os.getenv("PROGRAM_COUNTS_CACHE_TTL", 300))
+CALENDAR_CACHE_TTL = int(os.getenv("CALENDAR_CACHE_TTL", 60))
+CALENDAR_MAX_RANGE_DAYS = int(os.getenv("CALENDAR_MAX_RANGE_DAYS", 366))
+
+# Auth
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASHER_WORKERS = int(os.getenv("PASSWORD_HASHER_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASHER_MAX_PENDING = int(os.getenv("PASSWORD_HASHER_MAX_PENDING", 64))
+PASSWORD_HASHER_RETRY_AFTER = int(os.getenv("PASSWORD_HASHER_RETRY_AFTER", 2))
+
+# Mail outbox
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 100))
+MAIL_POLL_SECONDS = float(os.getenv("MAIL_POLL_SECONDS", 2))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+MAIL_RETRY_BASE_SECONDS = int(os.getenv("MAIL_RETRY_BASE_SECONDS", 30))
+MAIL_IDLE_DISCONNECT_SECONDS = int(os.getenv("MAIL_IDLE_DISCONNECT_SECONDS", 60))
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+EVENT_REMINDER_EMAILS = os.getenv("EVENT_REMINDER_EMAILS", "false").lower() == "true"
+EMAIL_FANOUT_CHUNK_SIZE = int(os.getenv("EMAIL_FANOUT_CHUNK_SIZE", 500))
+
+
+def _parse_devices(value: str) -> dict:
+    devices = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, sep, url = entry.strip().partition("=")
+        if not sep or not name.strip() or not url.strip():
+            raise ValueError(
+                f"Invalid ESP32_DEVICES entry {entry.strip()!r}, expected name=url"
+            )
+        devices[name.strip()] = url.strip()
+    if not devices:
+        raise ValueError("ESP32_DEVICES doesn't list any sensor")
+    return devices
+
+
+# Fingerprint sensors: "name=url,name=url"; ESP32_URL alone configures "default"
+SENSOR_DEVICES = _parse_devices(
+    os.getenv(
+        "ESP32_DEVICES", f"default={os.getenv('ESP32_URL', 'http://192.168.1.100')}"
+    )
+)
+SENSOR_TIMEOUT_SECONDS = float(os.getenv("SENSOR_TIMEOUT_SECONDS", 2.0))
+SENSOR_MAX_CONCURRENCY = int(os.getenv("SENSOR_MAX_CONCURRENCY", 4))
+SENSOR_FAILURE_THRESHOLD = int(os.getenv("SENSOR_FAILURE_THRESHOLD", 3))
+SENSOR_RESET_SECONDS = float(os.getenv("SENSOR_RESET_SECONDS", 30))
+# Shared secret the ESP32 sends as X-Device-Key when pushing data to the backend
+SENSOR_API_KEY = os.getenv("SENSOR_API_KEY")
+ENROLLMENT_PROGRESS_TTL = int(os.getenv("ENROLLMENT_PROGRESS_TTL", 900))
+# After this long with only the server's "started" marker, the status route
+# assumes the sensor doesn't push and polls it instead
+ENROLLMENT_PUSH_GRACE_SECONDS = float(os.getenv("ENROLLMENT_PUSH_GRACE_SECONDS", 5))
+# 1:N fingerprint identification (templates are padded/trimmed to this size)
+FINGERPRINT_TEMPLATE_BYTES = int(os.getenv("FINGERPRINT_TEMPLATE_BYTES", 512))
+FINGERPRINT_MATCH_THRESHOLD = float(os.getenv("FINGERPRINT_MATCH_THRESHOLD", 0.85))
+FINGERPRINT_SIMILARITY = os.getenv("FINGERPRINT_SIMILARITY", "hamming")
+# Attendance ingestion: scans are buffered per worker and written in batches
+ATTENDANCE_MAX_BATCH = int(os.getenv("ATTENDANCE_MAX_BATCH", 500))
+ATTENDANCE_FLUSH_SIZE = int(os.getenv("ATTENDANCE_FLUSH_SIZE", 1000))
+ATTENDANCE_FLUSH_SECONDS = float(os.getenv("ATTENDANCE_FLUSH_SECONDS", 1.0))
+ATTENDANCE_MAX_PENDING = int(os.getenv("ATTENDANCE_MAX_PENDING", 20000))
+ATTENDANCE_RETRY_AFTER = int(os.getenv("ATTENDANCE_RETRY_AFTER", 2))
+# Rows fetched per server-side cursor round trip and encoded per streamed block
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+# Bulk student import
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 20 * 1024 * 1024))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+# Log statements slower than this many seconds to the "app.slow_query" logger (0 = off)
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", 0))
@@ -0,0 +1,232 @@
+# app/core/instrumentation.py
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from app.core.config import SLOW_QUERY_SECONDS
+from app.core.metrics import Histogram
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+
+
+def _route_of(scope) -> str:
+    """Route template once the router has matched, e.g. /events/{event_id}."""
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class RequestStats:
+    """Queries issued while serving one request; shared with threadpool workers."""
+
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class LabeledHistograms:
+    """One Histogram per label tuple, created on first use."""
+
+    def __init__(self, label_names: Tuple[str, ...], buckets=None):
+        self.label_names = label_names
+        self.buckets = buckets
+        self._children: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = Histogram(self.buckets) if self.buckets else Histogram()
+                    self._children[values] = child
+        return child
+
+    def items(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class LabeledCounter:
+    def __init__(self, label_names: Tuple[str, ...]):
+        self.label_names = label_names
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class RequestMetrics:
+    def __init__(self):
+        route = ("method", "route")
+        self.latency = LabeledHistograms(route)
+        self.queries = LabeledHistograms(route, QUERY_COUNT_BUCKETS)
+        self.db_time = LabeledHistograms(route)
+        self.responses = LabeledCounter(("method", "route", "status"))
+        self.query_duration = Histogram()
+        self.slow_queries = 0
+
+
+request_metrics = RequestMetrics()
+
+
+# ------------------ SQLAlchemy hooks ------------------
+# Registered on the engines in app/core/database.py
+# The start time lives on the per-statement execution context, so a statement
+# that raises (and never reaches after_cursor_execute) leaves nothing behind.
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._query_started_at
+    elapsed = time.perf_counter() - started
+    request_metrics.query_duration.observe(elapsed)
+
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+        request_metrics.slow_queries += 1
+        # Statement only: parameters can hold personal data
+        slow_query_logger.warning(
+            f"{elapsed * 1000:.1f} ms"
+            f" [{_route_of(stats.scope) if stats else 'background'}]"
+            f" {' '.join(statement.split())[:1000]}"
+        )
+
+
+# ------------------ Middleware ------------------
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware, so the timing covers streamed response bodies too.
+    Requests are labeled with the route template (e.g. /events/{event_id}),
+    never the raw path, to keep the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+
+            labels = (scope["method"], _route_of(scope))
+            request_metrics.latency.labels(*labels).observe(elapsed)
+            request_metrics.queries.labels(*labels).observe(stats.queries)
+            request_metrics.db_time.labels(*labels).observe(stats.db_seconds)
+            request_metrics.responses.inc(*labels, str(status_code))
+
+
+# ------------------ Prometheus text format ------------------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def histogram_lines(name: str, help_text: str, series) -> list:
+    """series: iterable of (label names, label values, Histogram snapshot)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for names, values, snapshot in series:
+        for bound, count in snapshot["buckets"].items():
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_labels(names, values, le)} {count}")
+        lines.append(f"{name}_sum{_labels(names, values)} {snapshot['sum']}")
+        lines.append(f"{name}_count{_labels(names, values)} {snapshot['count']}")
+    return lines
+
+
+def scalar_lines(name: str, kind: str, help_text: str, series) -> list:
+    """series: iterable of (label names, label values, value)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for names, values, value in series:
+        lines.append(f"{name}{_labels(names, values)} {value}")
+    return lines
+
+
+def request_metric_lines() -> list:
+    m = request_metrics
+
+    def labeled(family):
+        return [
+            (family.label_names, values, child.snapshot())
+            for values, child in family.items()
+        ]
+
+    return [
+        *histogram_lines(
+            "http_request_duration_seconds",
+            "Request latency by route, including streamed bodies.",
+            labeled(m.latency),
+        ),
+        *scalar_lines(
+            "http_requests_total",
+            "counter",
+            "Responses by route and status code.",
+            [(m.responses.label_names, v, n) for v, n in m.responses.items()],
+        ),
+        *histogram_lines(
+            "http_request_db_queries",
+            "SQL statements executed per request.",
+            labeled(m.queries),
+        ),
+        *histogram_lines(
+            "http_request_db_seconds",
+            "Time spent in SQL statements per request.",
+            labeled(m.db_time),
+        ),
+        *histogram_lines(
+            "db_query_duration_seconds",
+            "Duration of every SQL statement, requests and background work alike.",
+            [((), (), m.query_duration.snapshot())],
+        ),
+        *scalar_lines(
+            "db_slow_queries_total",
+            "counter",
+            "Statements slower than SLOW_QUERY_SECONDS.",
+            [((), (), m.slow_queries)],
+        ),
+    ]
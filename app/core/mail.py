@@ -1,17 +1,38 @@
+import asyncio
+import logging
 import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import smtplib
 from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import (
+    MAIL_BATCH_SIZE,
+    MAIL_POLL_SECONDS,
+    MAIL_MAX_ATTEMPTS,
+    MAIL_RETRY_BASE_SECONDS,
+    MAIL_IDLE_DISCONNECT_SECONDS,
+)
+from app.core.database import SessionLocal
+from app.models.outbox import OutboxEmail
 
-load_dotenv()  
+load_dotenv()
+
+logger = logging.getLogger(__name__)
 
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT_STR = os.getenv("SMTP_PORT")
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+# Set to "false" (and leave SMTP_PASSWORD empty) to point at a local
+# `python -m aiosmtpd -n -l localhost:8025` stand-in
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
 
-if not all([SMTP_SERVER, SMTP_PORT_STR, SMTP_USER, SMTP_PASSWORD]):
+if not all([SMTP_SERVER, SMTP_PORT_STR, SMTP_USER]):
     raise ValueError("SMTP configuration is missing in environment variables")
 
 try:
@@ -20,19 +41,239 @@ except ValueError:
     raise ValueError(f"Invalid SMTP_PORT value: {SMTP_PORT_STR}")
 
 
-def send_email(to_email: str, subject: str, body: str):
+def _build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
     msg = MIMEMultipart()
     msg["From"] = SMTP_USER
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.attach(MIMEText(body, "html"))
+    return msg
+
+
+def _open_connection() -> smtplib.SMTP:
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+    if SMTP_STARTTLS:
+        server.starttls()
+    if SMTP_PASSWORD:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+
+# ------------------ Outbox ------------------
+def enqueue_email(db: Session, to_email: str, subject: str, body: str):
+    """Queues one email; it's sent by the mail worker after the caller commits."""
+    db.add(OutboxEmail(to_email=to_email, subject=subject, body=body))
+
+
+def enqueue_emails(db: Session, messages: list) -> int:
+    """
+    Queues many emails with one multi-row INSERT.
+    `messages` is a list of {"to_email", "subject", "body", "event_id"} dicts.
+    """
+    if not messages:
+        return 0
+    db.execute(insert(OutboxEmail.__table__), messages)
+    return len(messages)
+
+
+class MailWorker:
+    """
+    Drains the email_outbox table over one long-lived, authenticated SMTP
+    connection, claiming up to MAIL_BATCH_SIZE messages per query. Every
+    attempt is counted when it's claimed; failed messages are retried with
+    exponential backoff and marked failed after MAIL_MAX_ATTEMPTS.
+
+    Claims use FOR UPDATE SKIP LOCKED and move next_attempt_at past the send,
+    so workers on several hosts never pick up the same message.
+    """
+
+    def __init__(self):
+        self._smtp = None
+        self._last_used = 0.0
+        self._recent = deque()  # monotonic timestamps of recent sends
+        self.sent_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+        self.batches_total = 0
+        self.reconnects_total = 0
+
+    # -- SMTP connection --
+    def _connection(self, check: bool = False) -> smtplib.SMTP:
+        """
+        With check, a reused connection is probed with NOOP first. That's done
+        once per batch; a drop mid-batch is handled by _send's reconnect.
+        """
+        if self._smtp is not None:
+            if not check:
+                return self._smtp
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close()
+
+        self._smtp = _open_connection()
+        self.reconnects_total += 1
+        return self._smtp
+
+    def _close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send(self, msg: MIMEMultipart):
+        try:
+            self._connection().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._close()
+            self._connection().send_message(msg)
+        self._last_used = time.monotonic()
+
+    # -- Batches --
+    @staticmethod
+    def _retry_delay(attempts: int) -> timedelta:
+        return timedelta(seconds=MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+    def _claim(self, db: Session) -> list:
+        """
+        Claims up to MAIL_BATCH_SIZE due emails in one short transaction. Each
+        is charged an attempt and pushed to its retry time before it's sent,
+        so other hosts skip it, and a crash mid-send still counts the attempt.
+        """
+        now = datetime.now()
+        batch = (
+            db.query(OutboxEmail)
+            .filter(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.id)
+            .limit(MAIL_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        claimed = []
+        for email in batch:
+            if email.attempts >= MAIL_MAX_ATTEMPTS:
+                # Its last attempt was claimed but never finished
+                email.status = "failed"
+                self.failed_total += 1
+                continue
+            email.attempts += 1
+            email.next_attempt_at = now + self._retry_delay(email.attempts)
+            claimed.append(email)
+        db.commit()
+        return claimed
+
+    def _attempt_failed(self, email: OutboxEmail, error: Exception):
+        """The claimed attempt is already counted; decide whether to retry."""
+        email.last_error = str(error)
+        if email.attempts >= MAIL_MAX_ATTEMPTS:
+            email.status = "failed"
+            self.failed_total += 1
+            logger.error(f"Giving up on email {email.id}: {error}")
+            return
+
+        self.retried_total += 1
+        logger.warning(
+            f"Email {email.id} failed, retrying at {email.next_attempt_at}: {error}"
+        )
+
+    def _process_batch(self) -> int:
+        """
+        Sends one claimed batch. Runs in a worker thread. Returns messages
+        handled. Raises if the SMTP server can't be reached; the message being
+        sent keeps its attempt, claimed messages never tried get theirs back.
+        """
+        # Outcomes are committed one by one; don't reload the batch each time
+        db: Session = SessionLocal(expire_on_commit=False)
+        try:
+            batch = self._claim(db)
+            if not batch:
+                return 0
+
+            handled = 0
+            try:
+                self._connection(check=True)
+                for email in batch:
+                    try:
+                        self._send(
+                            _build_message(email.to_email, email.subject, email.body)
+                        )
+                    except (
+                        smtplib.SMTPResponseException,
+                        smtplib.SMTPRecipientsRefused,
+                    ) as e:
+                        # The server rejected this message; the rest may be fine
+                        self._attempt_failed(email, e)
+                    except Exception as e:
+                        self._attempt_failed(email, e)
+                        handled += 1
+                        raise
+                    else:
+                        email.status = "sent"
+                        email.sent_at = datetime.now()
+                        email.last_error = None
+                        self.sent_total += 1
+                        self._recent.append(time.monotonic())
+                    handled += 1
+                    # Recorded per message so a restart never resends it
+                    db.commit()
+            except Exception:
+                now = datetime.now()
+                for email in batch[handled:]:
+                    email.attempts -= 1
+                    email.next_attempt_at = now
+                raise
+            finally:
+                db.commit()
+                self.batches_total += 1
+
+            return handled
+        finally:
+            db.close()
+
+    def _close_if_idle(self):
+        if (
+            self._smtp is not None
+            and time.monotonic() - self._last_used > MAIL_IDLE_DISCONNECT_SECONDS
+        ):
+            self._close()
+
+    async def run(self):
+        backoff = 0
+        while True:
+            try:
+                handled = await asyncio.to_thread(self._process_batch)
+                backoff = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._close()
+                backoff = min(max(backoff * 2, MAIL_RETRY_BASE_SECONDS, 1), 300)
+                logger.warning(f"Mail worker paused for {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                continue
+
+            if handled < MAIL_BATCH_SIZE:
+                await asyncio.to_thread(self._close_if_idle)
+                await asyncio.sleep(MAIL_POLL_SECONDS)
+
+    def stats(self) -> dict:
+        cutoff = time.monotonic() - 60
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        return {
+            "sent_total": self.sent_total,
+            "failed_total": self.failed_total,
+            "retried_total": self.retried_total,
+            "batches_total": self.batches_total,
+            "reconnects_total": self.reconnects_total,
+            "sent_last_minute": len(self._recent),
+            "connected": self._smtp is not None,
+        }
+
 
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
-        print(f"Email sent to {to_email}")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        raise e
+mail_worker = MailWorker()
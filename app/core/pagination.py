@@ -0,0 +1,52 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import date, time
+from fastapi import HTTPException, status
+from sqlalchemy import and_, false, or_
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque keyset cursor: the sort-key values of the last row on a page."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, (date, time)) else v for v in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+def _after(column, value, descending: bool, nullable: bool):
+    # MySQL and SQLite sort NULL before every value
+    if value is None:
+        return false() if descending else column.isnot(None)
+    if descending:
+        return or_(column < value, column.is_(None)) if nullable else column < value
+    return column > value
+
+
+def keyset_filter(columns, values, descending: bool = False, nullable=()):
+    """
+    (a, b, c) > (x, y, z) spelled out so every dialect can use the index.
+    Columns listed in `nullable` may hold NULL, in the cursor and in the rows.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [
+            columns[j].is_(None) if values[j] is None else columns[j] == values[j]
+            for j in range(i)
+        ]
+        is_nullable = any(column is c for c in nullable)
+        clauses.append(and_(*equal, _after(column, values[i], descending, is_nullable)))
+    return or_(*clauses)
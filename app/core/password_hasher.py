@@ -0,0 +1,145 @@
+# app/core/password_hasher.py
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+from app.core.config import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASHER_WORKERS,
+    PASSWORD_HASHER_MAX_PENDING,
+    PASSWORD_HASHER_RETRY_AFTER,
+)
+
+
+# Top-level so they can be pickled into the worker processes
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode(
+        "utf-8"
+    )
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def _hash_batch(passwords: list, rounds: int) -> list:
+    return [_hash(password, rounds) for password in passwords]
+
+
+class HasherOverloadedError(HTTPException):
+    """503 raised when the pool already has max_pending hashes queued."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so hashing never eats the CPU of
+    the worker serving requests.
+
+    At most `max_pending` hashes may be queued or running; beyond that callers
+    get a 503 with Retry-After instead of piling up behind the pool. Routes use
+    the async methods so a queued hash waits on the event loop, not on one of
+    the request threadpool's threads.
+    """
+
+    def __init__(
+        self, workers: int, max_pending: int, rounds: int, retry_after: int
+    ):
+        self.workers = workers
+        self.rounds = rounds
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise HasherOverloadedError(self.retry_after)
+
+    def _run(self, fn, *args):
+        self._acquire()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    async def _run_async(self, fn, *args):
+        self._acquire()
+        try:
+            return await asyncio.wrap_future(self._executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash, password, self.rounds)
+
+    def hash_many(self, passwords: list) -> list:
+        """
+        Hashes a batch split into one slice per worker. Each slice holds a
+        single pending slot, so a bulk import can't starve logins of the pool.
+        """
+        if not passwords:
+            return []
+        size = -(-len(passwords) // self.workers)
+        slices = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+
+        acquired = 0
+        try:
+            for _ in slices:
+                self._acquire()
+                acquired += 1
+            futures = [
+                self._executor().submit(_hash_batch, part, self.rounds)
+                for part in slices
+            ]
+            return [hashed for future in futures for hashed in future.result()]
+        finally:
+            for _ in range(acquired):
+                self._slots.release()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify, password, hashed)
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await self._run_async(_verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when the stored hash was made with a different cost factor."""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASHER_WORKERS,
+    max_pending=PASSWORD_HASHER_MAX_PENDING,
+    rounds=BCRYPT_ROUNDS,
+    retry_after=PASSWORD_HASHER_RETRY_AFTER,
+)
@@ -3,12 +3,23 @@ import os
 from dotenv import load_dotenv
 import bcrypt
 import jwt
+import secrets
+import time
+from dataclasses import dataclass
 from typing import Dict
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_CACHE_SIZE,
+    SENSOR_API_KEY,
+)
 from app.core.database import get_db
-from app.models import User
+from app.models import User, UserRole
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +31,7 @@ ALGORITHM = os.getenv("ALGORITHM")
 # ------------------ Password Functions ------------------
 def hash_password(password: str) -> str:
     password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode("utf-8")
 
@@ -34,13 +45,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # ------------------ JWT Functions ------------------
 def create_access_token(data: Dict) -> str:
     to_encode = data.copy()
+    now = int(time.time())
+    to_encode.setdefault("iat", now)
+    to_encode.setdefault("exp", now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
     token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return token
 
 
 def decode_access_token(token: str) -> Dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token,
+            SECRET_KEY,
+            algorithms=[ALGORITHM],
+            options={"require": ["exp", "iat"]},
+        )
         return payload
     except jwt.InvalidTokenError:
         raise HTTPException(
@@ -84,3 +103,74 @@ def get_current_user(
         )
 
     return user
+
+
+# ------------------ Verified Principal ------------------
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight stand-in for User on routes that only need id and role."""
+
+    id: int
+    role: UserRole
+
+
+_principal_cache = TTLCache(
+    ttl=PRINCIPAL_CACHE_TTL, maxsize=PRINCIPAL_CACHE_SIZE, name="principal"
+)
+
+
+def invalidate_principal(user_id: int):
+    """
+    Call whenever a user's role changes or the user is removed. Drops the
+    cached principal in every worker.
+    """
+    _principal_cache.invalidate_everywhere(user_id)
+
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Returns the caller's id and role, hitting the database at most once per
+    PRINCIPAL_CACHE_TTL per user. The session is only opened on a cache miss.
+    """
+    payload = decode_access_token(token)
+    user_id = payload.get("user_id")
+
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = db.query(User.id, User.role).filter(User.id == user_id).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+
+    principal = Principal(id=row.id, role=row.role)
+    # Never keep a principal around longer than the token that proved it
+    ttl = min(PRINCIPAL_CACHE_TTL, payload["exp"] - time.time())
+    if ttl > 0:
+        _principal_cache.set(user_id, principal, ttl=ttl)
+
+    return principal
+
+
+# ------------------ Device Authentication ------------------
+def verify_device_key(x_device_key: str = Header(None)):
+    """Guards endpoints the ESP32 sensors call with the shared SENSOR_API_KEY."""
+    if not SENSOR_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sensor API key is not configured",
+        )
+    if not x_device_key or not secrets.compare_digest(x_device_key, SENSOR_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid device key"
+        )
@@ -1,10 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base, ensure_indexes
 from app.models.user import User
-from app.routes import auth, counts, events, notification, fingerprint
-from app.routes.notification_ws import websocket_endpoint
+from app.routes import (
+    auth,
+    counts,
+    events,
+    notification,
+    fingerprint,
+    attendance,
+    metrics,
+)
+from app.routes.notification_ws import (
+    websocket_endpoint,
+    enrollment_websocket_endpoint,
+)
 from app.core.background_task import event_notifier_loop
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.password_hasher import password_hasher
+from app.services.attendance import attendance_buffer
+from app.services.sensors import sensors
 import asyncio
 
 app = FastAPI(title="ARA Biometric Attendance System", version="1.0.0")
@@ -22,15 +37,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
 Base.metadata.create_all(bind=engine)
+# create_all doesn't touch existing tables; add indexes declared since
+ensure_indexes(engine)
 
 app.include_router(auth.router)
 app.include_router(counts.router)
 app.include_router(events.router)
 app.include_router(notification.router)
 app.include_router(fingerprint.router)
+app.include_router(attendance.router)
+app.include_router(metrics.router)
 
 app.websocket("/ws/notifications/")(websocket_endpoint)
+app.websocket("/ws/fingerprints/enrollment/{user_id}")(enrollment_websocket_endpoint)
 
 
 @app.get("/")
@@ -41,3 +63,15 @@ def root():
 @app.on_event("startup")
 async def start_background_tasks():
     asyncio.create_task(event_notifier_loop())
+    asyncio.create_task(attendance_buffer.run())
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    try:
+        await asyncio.to_thread(attendance_buffer.flush)
+    except Exception as e:
+        print(f"Failed to flush buffered attendance on shutdown: {e}")
+    password_hasher.shutdown()
+    await sensors.aclose()
+    await async_engine.dispose()
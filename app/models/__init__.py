@@ -2,3 +2,5 @@ from app.models.user import User, Program, UserRole
 from app.models.events import Event
 from app.models.notification import Notification
 from app.models.fingerprint import Fingerprint
+from app.models.outbox import OutboxEmail
+from app.models.attendance import Attendance, AttendanceSummary
@@ -0,0 +1,60 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.user import Program
+
+
+class Attendance(Base):
+    __tablename__ = "attendance"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    event_id = Column(
+        Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+    device_id = Column(String(50), nullable=False)
+    # Chosen by the scanner per tap, so a retried upload is recognised
+    idempotency_key = Column(String(64), nullable=False)
+    scanned_at = Column(DateTime, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    event = relationship("Event")
+    user = relationship("User")
+
+    __table_args__ = (
+        # One attendance per student per event; later taps are ignored
+        UniqueConstraint("event_id", "user_id", name="uq_attendance_event_user"),
+        UniqueConstraint("idempotency_key", name="uq_attendance_idempotency_key"),
+        # Per-event listing ordered by arrival
+        Index("ix_attendance_event_id_scanned_at", "event_id", "scanned_at"),
+    )
+
+
+class AttendanceSummary(Base):
+    """
+    Present count per (event, program), kept up to date by the attendance
+    ingest flush so dashboards never join users against attendance rows.
+    """
+
+    __tablename__ = "attendance_summary"
+
+    event_id = Column(
+        Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True
+    )
+    program = Column(Enum(Program), primary_key=True)
+    present_count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Time, DateTime, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    Date,
+    Time,
+    DateTime,
+    ForeignKey,
+    Index,
+)
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -24,3 +34,9 @@ class Event(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     notifications = relationship("Notification", back_populates="event")
+
+    __table_args__ = (
+        # Calendar/listing range scans: WHERE event_date >= ? AND event_date < ?
+        # ORDER BY event_date, start_time
+        Index("ix_events_event_date_start_time", "event_date", "start_time"),
+    )
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.sql import func
@@ -42,4 +43,8 @@ class Notification(Base):
         UniqueConstraint(
             "user_id", "event_id", "type", name="uq_user_event_notification"
         ),
+        # Inbox pagination: WHERE user_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Unread badge: COUNT(*) WHERE user_id = ? AND is_read = false
+        Index("ix_notifications_user_id_is_read", "user_id", "is_read"),
     )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from datetime import datetime
+from app.core.database import Base
+
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+
+    # Set for event reminder emails so per-event progress can be reported
+    event_id = Column(Integer, nullable=True, index=True)
+
+    # pending -> sent, or pending -> (retries) -> failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Worker claim query: WHERE status = 'pending' AND next_attempt_at <= ?
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -62,3 +62,17 @@ class User(Base):
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    __table_args__ = (
+        # Program rosters: filter by (program, role), sort/search by name or ID
+        Index(
+            "ix_users_program_role_last_name",
+            "program",
+            "role",
+            "last_name",
+            "first_name",
+        ),
+        Index("ix_users_program_role_student_id", "program", "role", "student_id_no"),
+        # Serves the first-name arm of the roster prefix search
+        Index("ix_users_program_role_first_name", "program", "role", "first_name"),
+    )
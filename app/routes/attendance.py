@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import Principal, get_current_principal, verify_device_key
+from app.models import Attendance, Event, User
+from app.schemas.attendance import ScanBatch
+from app.services.attendance import attendance_buffer
+from app.services.exports import EXPORT_MEDIA_TYPES, export_stream, stream_rows
+
+router = APIRouter(prefix="/attendance", tags=["Attendance"])
+
+
+# ------------------- BATCHED SCAN INGEST FROM ESP32 -------------------
+@router.post(
+    "/scans",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(verify_device_key)],
+)
+def ingest_scans(batch: ScanBatch):
+    """
+    Accepts up to ATTENDANCE_MAX_BATCH scans per call. They are written by the
+    background flusher; resending a batch with the same idempotency keys is safe.
+    """
+    accepted = attendance_buffer.submit(batch.device_id, batch.scans)
+    return {"accepted": accepted}
+
+
+# ------------------- EXPORT EVENT ATTENDANCE -------------------
+ATTENDANCE_EXPORT_HEADER = [
+    "Student ID",
+    "Last Name",
+    "First Name",
+    "Program",
+    "Scanned At",
+    "Device",
+]
+
+
+@router.get("/events/{event_id}/export")
+def export_event_attendance(
+    event_id: int,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Streams everyone who attended the event, in scan order, as CSV or XLSX."""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can export attendance",
+        )
+
+    if not db.query(Event.id).filter(Event.id == event_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+        )
+
+    statement = (
+        select(
+            User.student_id_no,
+            User.last_name,
+            User.first_name,
+            User.program,
+            Attendance.scanned_at,
+            Attendance.device_id,
+        )
+        .join(User, User.id == Attendance.user_id)
+        .where(Attendance.event_id == event_id)
+        .order_by(Attendance.scanned_at, Attendance.id)
+    )
+
+    filename = f"event-{event_id}-attendance.{format}"
+    return StreamingResponse(
+        export_stream(
+            format, ATTENDANCE_EXPORT_HEADER, stream_rows(statement), "Attendance"
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
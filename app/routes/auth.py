@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserResponse, UserLogin, UserProfileUpdate
+from app.core.password_hasher import password_hasher
 from app.core.security import (
-    hash_password,
-    verify_password,
+    Principal,
     create_access_token,
+    get_current_principal,
     get_current_user,
+    invalidate_principal,
 )
 from datetime import datetime, timedelta
+from html import escape
+from typing import Optional
 import secrets
+import tempfile
 from app.models.password_reset import PasswordReset
 from app.schemas.auth import ForgotPasswordSchema, ResetPasswordSchema
-from app.core.mail import send_email
+from app.core.config import FRONTEND_URL, IMPORT_MAX_BYTES
+from app.core.mail import enqueue_email
+from app.routes.counts import invalidate_program_counts
+from app.services.student_import import IMPORT_FORMATS, import_students
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -24,14 +35,14 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    existing_email = db.query(User).filter(User.email == user.email).first()
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_email = await db.scalar(select(User.id).where(User.email == user.email))
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     if user.student_id_no:
-        existing_student = (
-            db.query(User).filter(User.student_id_no == user.student_id_no).first()
+        existing_student = await db.scalar(
+            select(User.id).where(User.student_id_no == user.student_id_no)
         )
         if existing_student:
             raise HTTPException(status_code=400, detail="Student ID already registered")
@@ -43,28 +54,95 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         middle_initial=user.middle_initial,
         program=user.program,
         email=user.email,
-        password=hash_password(user.password),
+        password=await password_hasher.hash_async(user.password),
         role=user.role,
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    invalidate_program_counts()
 
     return new_user
 
 
+# ------------------- BULK IMPORT STUDENTS -------------------
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "json",
+}
+
+
+@router.post("/import-students")
+async def import_students_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson|json)$"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Creates students from a CSV (header row), NDJSON or JSON-array request
+    body, with the same fields as /register minus role. Returns how many were
+    created and an error for every row that was rejected.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can import students",
+        )
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv, application/x-ndjson or application/json",
+        )
+
+    # Spooled to disk past 1 MB, then parsed row by row in a worker thread
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as upload:
+        size = 0
+        async for block in request.stream():
+            size += len(block)
+            if size > IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Import is limited to {IMPORT_MAX_BYTES} bytes",
+                )
+            upload.write(block)
+        upload.seek(0)
+
+        report = await run_in_threadpool(import_students, db, upload, fmt)
+
+    if report["created"]:
+        invalidate_program_counts()
+
+    return report
+
+
 # ------------------- LOGIN -------------------
 @router.post("/login")
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.student_id_no == login_data.student_id_no).first()
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(
+        select(User).where(User.student_id_no == login_data.student_id_no)
+    )
 
-    if not user or not verify_password(login_data.password, user.password):
+    if not user or not await password_hasher.verify_async(
+        login_data.password, user.password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid student ID or password",
         )
 
+    # Transparently upgrade hashes made with an older cost factor
+    if password_hasher.needs_rehash(user.password):
+        user.password = await password_hasher.hash_async(login_data.password)
+        await db.commit()
+
     # Create JWT token
     token_data = {"user_id": user.id, "role": user.role.value}
     access_token = create_access_token(token_data)
@@ -97,31 +175,43 @@ def forgot_password(data: ForgotPasswordSchema, db: Session = Depends(get_db)):
     reset = PasswordReset(user_id=user.id, token=token, expires_at=expires)
 
     db.add(reset)
+    enqueue_email(
+        db,
+        user.email,
+        "Reset your password",
+        (
+            f"<p>Hi {escape(user.first_name)},</p>"
+            f"<p>Use the link below to reset your password. "
+            f"It expires in 15 minutes.</p>"
+            f'<p><a href="{FRONTEND_URL}/reset-password?token={token}">'
+            f"Reset password</a></p>"
+        ),
+    )
     db.commit()
 
-    return {"message": "Reset link sent", "token": token}
+    return {"message": "Reset link sent"}
 
 
 # ------------------- RESET PASSWORD -------------------
 @router.post("/reset-password")
-def reset_password(data: ResetPasswordSchema, db: Session = Depends(get_db)):
-    reset = (
-        db.query(PasswordReset)
-        .filter(
+async def reset_password(
+    data: ResetPasswordSchema, db: AsyncSession = Depends(get_async_db)
+):
+    reset = await db.scalar(
+        select(PasswordReset).where(
             PasswordReset.token == data.token,
             PasswordReset.expires_at > datetime.utcnow(),
         )
-        .first()
     )
 
     if not reset:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-    user = db.query(User).get(reset.user_id)
-    user.password = hash_password(data.new_password)
+    user = await db.get(User, reset.user_id)
+    user.password = await password_hasher.hash_async(data.new_password)
 
-    db.delete(reset)
-    db.commit()
+    await db.delete(reset)
+    await db.commit()
 
     return {"message": "Password updated successfully"}
 
@@ -173,4 +263,8 @@ def update_user_profile(
     db.commit()
     db.refresh(current_user)
 
+    invalidate_principal(current_user.id)
+    if profile_data.program is not None:
+        invalidate_program_counts()
+
     return current_user
@@ -1,51 +1,227 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import (
+    PROGRAM_COUNTS_CACHE_TTL,
+    ROSTER_PAGE_SIZE,
+    ROSTER_MAX_PAGE_SIZE,
+)
+from app.core.pagination import encode_cursor, decode_cursor, keyset_filter
 from app.core.database import get_db
-from app.models import User, Program, UserRole
+from app.core.security import Principal, get_current_principal
+from app.models import AttendanceSummary, Event, User, Program, UserRole
+from app.services.exports import EXPORT_MEDIA_TYPES, export_stream, stream_rows
 
 router = APIRouter(prefix="/programs", tags=["Programs"])
 
+_program_counts_cache = TTLCache(
+    ttl=PROGRAM_COUNTS_CACHE_TTL, maxsize=1, name="program_counts"
+)
+
+
+def invalidate_program_counts():
+    """
+    Call after any write that adds, removes or moves a student between programs.
+    Clears the cache in every worker.
+    """
+    _program_counts_cache.invalidate_everywhere()
+
 
 # ------------------- COUNTS PROGRAMS -------------------
 @router.get("/counts")
 def get_program_counts(db: Session = Depends(get_db)):
-    result = []
-    for prog in Program:
-        count = (
-            db.query(User)
-            .filter(User.program == prog, User.role == UserRole.STUDENT)
-            .count()
-        )
-        result.append({"code": prog.value, "name": prog.name, "students": count})
+    return _program_counts(db)
+
+
+def _program_counts(db: Session) -> list:
+    result = _program_counts_cache.get("counts")
+    if result is not None:
+        return result
+
+    counts = dict(
+        db.query(User.program, func.count(User.id))
+        .filter(User.role == UserRole.STUDENT)
+        .group_by(User.program)
+        .all()
+    )
+
+    result = [
+        {"code": prog.value, "name": prog.name, "students": counts.get(prog, 0)}
+        for prog in Program
+    ]
+    _program_counts_cache.set("counts", result)
     return result
 
 
+# ------------------- EVENT ATTENDANCE PER PROGRAM -------------------
+@router.get("/attendance/{event_id}")
+def get_event_attendance_counts(event_id: int, db: Session = Depends(get_db)):
+    """
+    Present/absent per program, read from attendance_summary plus the cached
+    program tallies above. Absent is every student of the program not present.
+    """
+    present = dict(
+        db.query(AttendanceSummary.program, AttendanceSummary.present_count)
+        .filter(AttendanceSummary.event_id == event_id)
+        .all()
+    )
+    if not present and not db.query(Event.id).filter(Event.id == event_id).first():
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    programs = []
+    for row in _program_counts(db):
+        count = present.get(Program(row["code"]), 0)
+        programs.append(
+            {
+                **row,
+                "present": count,
+                "absent": max(row["students"] - count, 0),
+            }
+        )
+
+    return {
+        "event_id": event_id,
+        "present": sum(row["present"] for row in programs),
+        "absent": sum(row["absent"] for row in programs),
+        "programs": programs,
+    }
+
+
 # ------------------- FILTER STUDENTS BY PROGRAM -------------------
+# Sorted on the raw columns so ix_users_program_role_* serve the ORDER BY
+ROSTER_SORT_KEYS = {
+    "last_name": (User.last_name, User.first_name, User.id),
+    "student_id_no": (User.student_id_no, User.id),
+}
+# student_id_no is nullable; keyset_filter pages through the NULLs explicitly
+ROSTER_NULLABLE_KEYS = (User.student_id_no,)
+
+
 @router.get("/{program_code}/students")
-def get_students_by_program(program_code: str, db: Session = Depends(get_db)):
+def get_students_by_program(
+    program_code: str,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    sort: str = Query("last_name", pattern="^(last_name|student_id_no)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(ROSTER_PAGE_SIZE, ge=1, le=ROSTER_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    try:
+        program_enum = Program(program_code)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid program code")
+
+    sort_columns = ROSTER_SORT_KEYS[sort]
+    descending = order == "desc"
+
+    query = db.query(
+        User.id,
+        User.student_id_no,
+        User.first_name,
+        User.last_name,
+        User.program,
+        User.email,
+        User.status,
+    ).filter(
+        User.program == program_enum,
+        User.role == UserRole.STUDENT,
+    )
+
+    if q:
+        query = query.filter(
+            or_(
+                User.last_name.startswith(q, autoescape=True),
+                User.first_name.startswith(q, autoescape=True),
+                User.student_id_no.startswith(q, autoescape=True),
+            )
+        )
+
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        query = query.filter(
+            keyset_filter(sort_columns, values, descending, ROSTER_NULLABLE_KEYS)
+        )
+
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column in sort_columns)
+    )
+
+    students = query.limit(limit + 1).all()
+    has_more = len(students) > limit
+    students = students[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = students[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in sort_columns])
+
+    return {
+        "items": [
+            {
+                "id": s.id,
+                "student_id_no": s.student_id_no,
+                "first_name": s.first_name,
+                "last_name": s.last_name,
+                "program": s.program.value,
+                "email": s.email,
+                "fingerprint_status": s.status,
+            }
+            for s in students
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+# ------------------- EXPORT PROGRAM ROSTER -------------------
+ROSTER_EXPORT_HEADER = [
+    "Student ID",
+    "Last Name",
+    "First Name",
+    "M.I.",
+    "Program",
+    "Email",
+    "Fingerprint Status",
+]
+
+
+@router.get("/{program_code}/students/export")
+def export_students_by_program(
+    program_code: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Streams the whole roster, sorted by name, as CSV or XLSX."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can export rosters")
+
     try:
         program_enum = Program(program_code)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid program code")
 
-    students = (
-        db.query(User)
-        .filter(
-            User.program == program_enum,
-            User.role == UserRole.STUDENT,
+    statement = (
+        select(
+            User.student_id_no,
+            User.last_name,
+            User.first_name,
+            User.middle_initial,
+            User.program,
+            User.email,
+            User.status,
         )
-        .all()
+        .where(User.program == program_enum, User.role == UserRole.STUDENT)
+        .order_by(User.last_name, User.first_name, User.id)
     )
 
-    return [
-        {
-            "id": s.id,
-            "student_id_no": s.student_id_no,
-            "first_name": s.first_name,
-            "last_name": s.last_name,
-            "program": s.program.value,
-            "email": s.email,
-            "fingerprint_status": s.status,  
-        }
-        for s in students
-    ]
+    filename = f"{program_enum.value}-students.{format}"
+    return StreamingResponse(
+        export_stream(
+            format, ROSTER_EXPORT_HEADER, stream_rows(statement), program_enum.value
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,28 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import and_, not_, or_
 from sqlalchemy.orm import Session
-from typing import List
-
+from datetime import date, datetime, time
+from typing import Optional
+import hashlib
+import json
+
+from app.core.cache import TTLCache
+from app.core.config import (
+    CALENDAR_CACHE_TTL,
+    CALENDAR_MAX_RANGE_DAYS,
+    EVENTS_PAGE_SIZE,
+    EVENTS_MAX_PAGE_SIZE,
+)
 from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_cursor, keyset_filter
 from app.models.events import Event
-from app.models.user import User
-from app.schemas.event import EventCreate, EventResponse, EventUpdate
-from app.core.security import get_current_user
-from app.services.notifications import notify_today_events
-from sqlalchemy import extract
+from app.schemas.event import EventCreate, EventResponse, EventSummary, EventUpdate
+from app.core.security import Principal, get_current_principal
+from app.core import background_task
+from app.services.event_emails import get_event_email_progress
 from fastapi import Query
-from typing import List
 from app.schemas.event import EventResponse
 
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+_calendar_cache = TTLCache(ttl=CALENDAR_CACHE_TTL, maxsize=64, name="calendar")
+
+
+def _events_changed():
+    """Call after every event write."""
+    _calendar_cache.invalidate_everywhere()
+    background_task.scheduler.reschedule()
+
 
 # ------------------- ADDING OF EVENTS (ADMIN ONLY) -------------------
 @router.post("/", response_model=EventResponse, status_code=201)
 def create_event(
     event: EventCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     if current_user.role != "admin":
         raise HTTPException(403, "Only admins can create events")
@@ -41,21 +61,84 @@ def create_event(
     db.commit()
     db.refresh(new_event)
 
-    try:
-        notify_today_events(db)
-    except Exception as e:
-        pass
+    _events_changed()
 
     return new_event
 
 
 # ------------------- GET ALL EVENTS -------------------
-@router.get("/", response_model=List[EventResponse])
-def get_all_events(db: Session = Depends(get_db)):
-    events = (
-        db.query(Event).order_by(Event.event_date.asc(), Event.start_time.asc()).all()
+@router.get("/", response_model=dict)
+def get_all_events(
+    from_date: Optional[date] = Query(None, description="Inclusive"),
+    to_date: Optional[date] = Query(None, description="Inclusive"),
+    upcoming: Optional[bool] = Query(
+        None, description="true: not yet ended, false: already ended (newest first)"
+    ),
+    summary: bool = Query(False, description="Leave out the description"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    if summary:
+        query = db.query(
+            Event.id,
+            Event.title,
+            Event.event_date,
+            Event.start_time,
+            Event.end_time,
+            Event.location,
+        )
+        schema = EventSummary
+    else:
+        query = db.query(Event)
+        schema = EventResponse
+
+    if from_date is not None:
+        query = query.filter(Event.event_date >= from_date)
+    if to_date is not None:
+        query = query.filter(Event.event_date <= to_date)
+
+    if upcoming is not None:
+        now = datetime.now()
+        not_ended = or_(
+            Event.event_date > now.date(),
+            and_(Event.event_date == now.date(), Event.end_time >= now.time()),
+        )
+        query = query.filter(not_ended if upcoming else not_(not_ended))
+
+    # Past events read newest first, everything else oldest first
+    descending = upcoming is False
+    sort_columns = (Event.event_date, Event.start_time, Event.id)
+
+    if cursor:
+        event_date, start_time, event_id = decode_cursor(cursor, len(sort_columns))
+        try:
+            values = (
+                date.fromisoformat(event_date),
+                time.fromisoformat(start_time),
+                event_id,
+            )
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(keyset_filter(sort_columns, values, descending))
+
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for column in sort_columns)
     )
-    return events
+
+    events = query.limit(limit + 1).all()
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = events[-1]
+        next_cursor = encode_cursor([last.event_date, last.start_time, last.id])
+
+    return {
+        "items": [schema.model_validate(e) for e in events],
+        "next_cursor": next_cursor,
+    }
 
 
 # ------------------- COUNT ALL EVENTS -------------------
@@ -71,7 +154,7 @@ def update_event(
     event_id: int = Path(..., description="ID of the event to update"),
     event: EventUpdate = Body(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
 
     if current_user.role != "admin":
@@ -94,10 +177,7 @@ def update_event(
     db.commit()
     db.refresh(existing_event)
 
-    try:
-        notify_today_events(db)
-    except Exception as e:
-        pass
+    _events_changed()
 
     return existing_event
 
@@ -107,7 +187,7 @@ def update_event(
 def delete_event(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
 
     if current_user.role != "admin":
@@ -126,32 +206,87 @@ def delete_event(
     db.delete(event)
     db.commit()
 
+    _events_changed()
+
     return {"message": "Event deleted successfully"}
 
 
 # ------------------- GET EVENTS BY MONTH (CALENDAR VIEW) -------------------
 @router.get("/calendar", response_model=dict)
 def get_events_by_month(
-    year: int = Query(...),
-    month: int = Query(..., ge=1, le=12),
+    request: Request,
+    # 9998 so the end of December is still a valid date
+    year: Optional[int] = Query(None, ge=1, le=9998),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    start: Optional[date] = Query(None, description="Range start (inclusive)"),
+    end: Optional[date] = Query(None, description="Range end (exclusive)"),
     db: Session = Depends(get_db),
 ):
-    events = (
-        db.query(Event)
-        .filter(extract("year", Event.event_date) == year)
-        .filter(extract("month", Event.event_date) == month)
-        .order_by(Event.event_date.asc(), Event.start_time.asc())
-        .all()
-    )
+    if year is not None and month is not None:
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    elif start is None or end is None:
+        raise HTTPException(
+            status_code=400, detail="Provide either year and month, or start and end"
+        )
+    elif not 0 < (end - start).days <= CALENDAR_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end must be after start and within {CALENDAR_MAX_RANGE_DAYS} days",
+        )
 
-    return {
-        "year": year,
-        "month": month,
-        "total_events": len(events),
-        "events": [
-            EventResponse.from_orm(e) for e in events
-        ],  
-    }
+    # Month and range requests cover the same dates with differently shaped bodies
+    if year is not None and month is not None:
+        cache_key = ("month", year, month)
+    else:
+        cache_key = ("range", start, end)
+
+    cached = _calendar_cache.get(cache_key)
+    if cached is None:
+        events = (
+            db.query(Event)
+            .filter(Event.event_date >= start, Event.event_date < end)
+            .order_by(Event.event_date.asc(), Event.start_time.asc())
+            .all()
+        )
+
+        body = {
+            "total_events": len(events),
+            "events": [EventResponse.from_orm(e) for e in events],
+        }
+        if cache_key[0] == "month":
+            body = {"year": year, "month": month, **body}
+        else:
+            body = {"start": start, "end": end, **body}
+
+        body = jsonable_encoder(body)
+        etag = '"' + hashlib.sha1(
+            json.dumps(body, sort_keys=True).encode("utf-8")
+        ).hexdigest() + '"'
+        cached = (etag, body)
+        _calendar_cache.set(cache_key, cached)
+
+    etag, body = cached
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return JSONResponse(content=body, headers={"ETag": etag})
+
+
+# ------------------- REMINDER EMAIL PROGRESS (ADMIN ONLY) -------------------
+@router.get("/{event_id}/reminder-emails")
+def get_reminder_email_progress(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view reminder email progress",
+        )
+
+    return get_event_email_progress(db, event_id)
 
 
 # ------------------- GET SINGLE EVENT BY ID -------------------
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.core.broadcast import broadcast
+from app.core.database import get_async_db
+from app.core.security import Principal, get_current_principal, verify_device_key
+from app.models import Fingerprint
 from app.models.user import User, FingerprintStatus
-import httpx
+from app.schemas.user import EnrollmentProgress, FingerprintProbe
+from app.services.enrollment import SENSOR_STATUS_MAP, STARTED_STEP, latest_progress
+from app.services.fingerprint_matcher import fingerprint_matcher
+from app.services.sensors import sensors, SensorUnavailableError
 import asyncio
+import base64
 
 router = APIRouter(prefix="/fingerprints", tags=["Fingerprints"])
 
-ESP32_URL = "http://192.168.1.100" 
-
 
 # ------------------- TRIGGER CONNECTION FROM ESP32 AND ENROLL FINGERPRINT -------------------
 @router.post("/enroll/{user_id}")
 async def trigger_fingerprint_enrollment(
     user_id: int,
-    db: Session = Depends(get_db),
+    device: Optional[str] = Query(None, description="Sensor name, default if omitted"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
 
     if not user:
         raise HTTPException(
@@ -30,12 +38,18 @@ async def trigger_fingerprint_enrollment(
             detail="User already has a fingerprint enrolled",
         )
 
+    sensor = sensors.get(device)
+    if sensor.circuit_state == "open":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cannot connect to fingerprint sensor",
+        )
+
     user.status = FingerprintStatus.PENDING
-    db.commit()
+    await db.commit()
 
     try:
-        async with httpx.AsyncClient() as client:
-            await client.post(f"{ESP32_URL}/enroll", timeout=2.0)
+        await sensor.post("/enroll")
     except Exception as e:
         print(f"Error connecting to ESP32: {e}")
         raise HTTPException(
@@ -43,6 +57,19 @@ async def trigger_fingerprint_enrollment(
             detail="Cannot connect to fingerprint sensor",
         )
 
+    # Replaces any progress left over from a previous attempt
+    await broadcast.publish(
+        {
+            "type": "enrollment",
+            "progress": {
+                "user_id": user.id,
+                "status": "in_progress",
+                "step": STARTED_STEP,
+                "message": "",
+            },
+        }
+    )
+
     return {
         "message": "Fingerprint enrollment started",
         "user_id": user.id,
@@ -50,13 +77,88 @@ async def trigger_fingerprint_enrollment(
     }
 
 
+# ------------------- ENROLLMENT EVENTS PUSHED BY ESP32 -------------------
+@router.post("/enrollment-events", dependencies=[Depends(verify_device_key)])
+async def receive_enrollment_event(
+    event: EnrollmentProgress,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    The sensor reports every enrollment step here instead of being polled.
+    User.status is only written when it actually changes, and every report is
+    pushed to admins watching /ws/fingerprints/enrollment/{user_id}.
+
+    The template that comes with a "success" report is stored (replacing the
+    user's previous one) and added to the in-memory matcher of every worker.
+    """
+    new_status = SENSOR_STATUS_MAP[event.status]
+    result = await db.execute(
+        update(User)
+        .where(User.id == event.user_id, User.status != new_status)
+        .values(status=new_status)
+    )
+    changed = result.rowcount > 0
+    if not changed:
+        if not await db.scalar(select(User.id).where(User.id == event.user_id)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+
+    # Stored whenever one arrives: a re-enrollment replaces the user's template
+    # even though User.status stays "enrolled"
+    fingerprint = None
+    if event.status == "success" and event.template:
+        fingerprint = await db.scalar(
+            select(Fingerprint)
+            .where(Fingerprint.user_id == event.user_id)
+            .order_by(Fingerprint.id.desc())
+            .limit(1)
+        )
+        if fingerprint is None:
+            fingerprint = Fingerprint(
+                user_id=event.user_id, fingerprint_template=event.template
+            )
+            db.add(fingerprint)
+        elif fingerprint.fingerprint_template != event.template:
+            fingerprint.fingerprint_template = event.template
+        else:
+            fingerprint = None  # resent report, nothing new to store
+    await db.commit()
+
+    if fingerprint is not None:
+        await broadcast.publish(
+            {
+                "type": "fingerprint",
+                "action": "add",
+                "fingerprint_id": fingerprint.id,
+                "user_id": event.user_id,
+                "template": base64.b64encode(event.template).decode(),
+            }
+        )
+
+    await broadcast.publish(
+        {
+            "type": "enrollment",
+            "progress": event.model_dump(exclude={"device", "template"}),
+        }
+    )
+
+    return {
+        "user_id": event.user_id,
+        "fingerprint_status": new_status,
+        "changed": changed,
+    }
+
+
 # ------------------- GET FINGERPRINT STATUS -------------------
 @router.get("/enrollment-status/{user_id}")
 async def get_enrollment_status(
     user_id: int,
-    db: Session = Depends(get_db),
+    device: Optional[str] = Query(None, description="Sensor name, default if omitted"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
 
     if not user:
         raise HTTPException(
@@ -64,23 +166,43 @@ async def get_enrollment_status(
             detail="User not found",
         )
 
+    # Sensors that push progress are only polled if they go quiet after the start
+    progress = latest_progress(user_id)
+    if progress is not None:
+        return {
+            "status": progress["status"],
+            "step": progress["step"],
+            "message": progress["message"],
+        }
+    if user.status == FingerprintStatus.ENROLLED:
+        return {"status": "success", "step": "done", "message": ""}
+    if user.status == FingerprintStatus.FAILED:
+        return {"status": "failed", "step": "done", "message": ""}
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{ESP32_URL}/status", timeout=2.0)
-            esp_status = response.json()
-
-            if esp_status["status"] == "success":
-                user.status = FingerprintStatus.ENROLLED
-                db.commit()
-            elif esp_status["status"] == "failed":
-                user.status = FingerprintStatus.FAILED
-                db.commit()
-
-            return {
-                "status": esp_status["status"],
-                "step": esp_status["step"],
-                "message": esp_status.get("message", ""),
-            }
+        response = await sensors.get(device).get("/status")
+        esp_status = response.json()
+
+        if esp_status["status"] == "success":
+            user.status = FingerprintStatus.ENROLLED
+            await db.commit()
+        elif esp_status["status"] == "failed":
+            user.status = FingerprintStatus.FAILED
+            await db.commit()
+
+        return {
+            "status": esp_status["status"],
+            "step": esp_status["step"],
+            "message": esp_status.get("message", ""),
+        }
+    except HTTPException:
+        raise
+    except SensorUnavailableError:
+        return {
+            "status": "failed",
+            "step": "sensor_unavailable",
+            "message": "Sensor is not responding, try again shortly",
+        }
     except Exception as e:
         print(f"Error getting ESP32 status: {e}")
         return {
@@ -88,3 +210,55 @@ async def get_enrollment_status(
             "step": "connection_error",
             "message": "Cannot connect to sensor",
         }
+
+
+# ------------------- IDENTIFY A SCANNED FINGERPRINT -------------------
+@router.post("/identify", dependencies=[Depends(verify_device_key)])
+async def identify_fingerprint(
+    probe: FingerprintProbe,
+    db: AsyncSession = Depends(get_async_db),
+):
+    await fingerprint_matcher.ensure_loaded(db)
+
+    match = fingerprint_matcher.identify(probe.template)
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No matching fingerprint",
+        )
+
+    user_id, score = match
+    return {"user_id": user_id, "score": round(score, 4)}
+
+
+# ------------------- DELETE ENROLLED FINGERPRINT -------------------
+@router.delete("/{user_id}")
+async def delete_fingerprint(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can delete fingerprints",
+        )
+
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(status=FingerprintStatus.NOT_ENROLLED.value)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    deleted = await db.execute(delete(Fingerprint).where(Fingerprint.user_id == user_id))
+    await db.commit()
+
+    await broadcast.publish(
+        {"type": "fingerprint", "action": "remove", "user_id": user_id}
+    )
+
+    return {"message": "Fingerprint deleted", "deleted": deleted.rowcount}
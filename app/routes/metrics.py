@@ -0,0 +1,94 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.database import get_pool_stats
+from app.core.instrumentation import (
+    histogram_lines,
+    request_metric_lines,
+    scalar_lines,
+)
+from app.core.mail import mail_worker
+from app.services.attendance import attendance_buffer
+from app.services.notifications import notification_cache_stats
+from app.services.sensors import sensors
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# ------------------- PROMETHEUS SCRAPE ENDPOINT -------------------
+@router.get("", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """
+    Prometheus text exposition of this worker's request, query, pool and
+    notification cache metrics. Each worker process keeps its own counters.
+    """
+    pool = get_pool_stats()
+    lines = request_metric_lines()
+    for name, key, help_text in (
+        ("db_pool_size", "size", "Configured pool size."),
+        ("db_pool_checked_out", "checked_out", "Connections in use."),
+        ("db_pool_overflow", "overflow", "Connections opened beyond the pool size."),
+    ):
+        lines += scalar_lines(name, "gauge", help_text, [((), (), pool[key])])
+    lines += scalar_lines(
+        "db_pool_timeouts_total",
+        "counter",
+        "Checkouts that gave up waiting for a connection.",
+        [((), (), pool["timeouts"])],
+    )
+    lines += histogram_lines(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection.",
+        [((), (), pool["checkout_wait_seconds"])],
+    )
+    lines += histogram_lines(
+        "db_pool_hold_seconds",
+        "Time a connection stays checked out.",
+        [((), (), pool["hold_time_seconds"])],
+    )
+
+    cache = notification_cache_stats()
+    for name, kind, key, help_text in (
+        ("notification_cache_entries", "gauge", "size", "Cached (event, user) keys."),
+        ("notification_cache_hits_total", "counter", "hits", "Lookups found cached."),
+        ("notification_cache_misses_total", "counter", "misses", "Lookups not cached."),
+        (
+            "notification_cache_evictions_total",
+            "counter",
+            "evictions",
+            "Keys evicted to stay under the size cap.",
+        ),
+    ):
+        lines += scalar_lines(name, kind, help_text, [((), (), cache[key])])
+    return PlainTextResponse(
+        "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4"
+    )
+
+
+# ------------------- MAIL OUTBOX METRICS -------------------
+@router.get("/mail")
+def get_mail_metrics():
+    return mail_worker.stats()
+
+
+# ------------------- DATABASE POOL METRICS -------------------
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    return get_pool_stats()
+
+
+# ------------------- FINGERPRINT SENSOR METRICS -------------------
+@router.get("/sensors")
+def get_sensor_metrics():
+    return sensors.stats()
+
+
+# ------------------- NOTIFICATION DEDUPE CACHE METRICS -------------------
+@router.get("/notification-cache")
+def get_notification_cache_metrics():
+    return notification_cache_stats()
+
+
+# ------------------- ATTENDANCE INGEST METRICS -------------------
+@router.get("/attendance")
+def get_attendance_metrics():
+    return attendance_buffer.stats()
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Optional
+from app.core.config import (
+    NOTIFICATIONS_PAGE_SIZE,
+    NOTIFICATIONS_MAX_PAGE_SIZE,
+    NOTIFICATIONS_MAX_BULK_IDS,
+)
 from app.core.database import get_db
-from app.models import Notification, Event, User
+from app.models import Notification, Event
 from app.routes.notification_ws import manager
-from app.core.security import get_current_user
+from app.core.security import Principal, get_current_principal
+from app.schemas.notification import NotificationBulkRead, NotificationBulkDelete
+from app.services.notifications import notification_payload
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
@@ -12,68 +21,150 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
 # ------------------- GETS CURRENT USER NOTIFICATION -------------------
 @router.get("/")
 def get_notifications(
-    current_user: User = Depends(get_current_user),
+    before_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(NOTIFICATIONS_PAGE_SIZE, ge=1, le=NOTIFICATIONS_MAX_PAGE_SIZE),
+    is_read: Optional[bool] = Query(None),
+    notification_type: Optional[str] = Query(None, alias="type"),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     try:
 
-        notifications = (
-            db.query(Notification)
-            .filter(Notification.user_id == current_user.id)
-            .order_by(Notification.id.desc())
-            .all()
+        query = db.query(
+            Notification.id,
+            Notification.user_id,
+            Notification.event_id,
+            Notification.title,
+            Notification.message,
+            Notification.type,
+            Notification.is_read,
+            Notification.timestamp,
+        ).filter(Notification.user_id == current_user.id)
+
+        if before_id is not None:
+            query = query.filter(Notification.id < before_id)
+        if is_read is not None:
+            query = query.filter(Notification.is_read == is_read)
+        if notification_type is not None:
+            query = query.filter(Notification.type == notification_type)
+
+        # Fetch one extra row to know whether another page exists
+        notifications = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+
+        unread_count = (
+            db.query(func.count(Notification.id))
+            .filter(
+                Notification.user_id == current_user.id,
+                Notification.is_read == False,
+            )
+            .scalar()
         )
 
-        result = []
-        for n in notifications:
-            result.append(
-                {
-                    "id": n.id,
-                    "user_id": n.user_id,
-                    "event_id": n.event_id,
-                    "title": n.title,
-                    "message": n.message,
-                    "type": n.type,
-                    "is_read": n.is_read,
-                    "timestamp": n.timestamp.isoformat() if n.timestamp else None,
-                }
-            )
+        return {
+            "items": [notification_payload(n) for n in notifications],
+            "next_before_id": notifications[-1].id if has_more else None,
+            "unread_count": unread_count,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return result
 
+# ------------------- MARK NOTIFICATIONS AS READ (BULK) -------------------
+@router.patch("/read")
+def mark_notifications_as_read(
+    data: NotificationBulkRead,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    if (data.ids is None) == (data.up_to_id is None):
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of 'ids' or 'up_to_id'"
+        )
+    if data.ids is not None and len(data.ids) > NOTIFICATIONS_MAX_BULK_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {NOTIFICATIONS_MAX_BULK_IDS} ids per request",
+        )
+
+    query = db.query(Notification).filter(
+        Notification.user_id == current_user.id, Notification.is_read == False
+    )
+    if data.ids is not None:
+        query = query.filter(Notification.id.in_(data.ids))
+    else:
+        query = query.filter(Notification.id <= data.up_to_id)
+
+    try:
+        count = query.update({Notification.is_read: True}, synchronize_session=False)
+        db.commit()
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    return {"status": "success", "updated_count": count}
+
 
 # ------------------- MARK NOTIFICATION AS READ -------------------
 @router.patch("/{notification_id}/read")
 def mark_notification_as_read(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    notification = (
+    count = (
         db.query(Notification)
         .filter(
             Notification.id == notification_id, Notification.user_id == current_user.id
         )
-        .first()
+        .update({Notification.is_read: True}, synchronize_session=False)
     )
 
-    if not notification:
+    if not count:
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    notification.is_read = True
     db.commit()
 
     return {"status": "success", "id": notification_id}
 
 
+# ------------------- DELETE NOTIFICATIONS (BULK) -------------------
+@router.post("/delete")
+def delete_notifications(
+    data: NotificationBulkDelete,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    if len(data.ids) > NOTIFICATIONS_MAX_BULK_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {NOTIFICATIONS_MAX_BULK_IDS} ids per request",
+        )
+
+    try:
+        count = (
+            db.query(Notification)
+            .filter(
+                Notification.user_id == current_user.id,
+                Notification.id.in_(data.ids),
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"status": "deleted", "deleted_count": count}
+
+
 # ------------------- DELETE NOTIFICATION -------------------
 @router.delete("/{notification_id}")
 def delete_notification(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     notification = (
@@ -96,7 +187,7 @@ def delete_notification(
 # ------------------- DELETE ALL NOTIFICATIONS -------------------
 @router.delete("/")
 def delete_all_notifications(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)
 ):
     try:
         count = (
@@ -1,39 +1,68 @@
-from fastapi import WebSocket, WebSocketDisconnect, Query
-from typing import List, Optional
+from fastapi import WebSocket, WebSocketDisconnect, Query, HTTPException, status
+from typing import Dict, Iterable, Optional, Set, Tuple
+from app.core.config import WS_SEND_TIMEOUT_SECONDS
+from app.core.security import decode_access_token
 import asyncio
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, send_timeout: float = WS_SEND_TIMEOUT_SECONDS):
+        self.active_connections: Dict[int, Set[WebSocket]] = {}
+        self.send_timeout = send_timeout
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.setdefault(user_id, set()).add(websocket)
 
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+    def disconnect(self, user_id: int, websocket: WebSocket):
+        sockets = self.active_connections.get(user_id)
+        if not sockets:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self.active_connections[user_id]
 
-    async def send_notification(self, message: dict):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                disconnected.append(connection)
+    async def _send(self, user_id: int, websocket: WebSocket, message: dict):
+        try:
+            await asyncio.wait_for(websocket.send_json(message), self.send_timeout)
+        except Exception:
+            # Slow or dead client: drop it so it can't stall future pushes
+            self.disconnect(user_id, websocket)
 
-        for conn in disconnected:
-            self.disconnect(conn)
+    async def send_to_users(self, messages: Iterable[Tuple[int, dict]]):
+        """Pushes each message only to the sockets of its user, concurrently."""
+        sends = [
+            self._send(user_id, websocket, message)
+            for user_id, message in messages
+            for websocket in list(self.active_connections.get(user_id, ()))
+        ]
+        if sends:
+            await asyncio.gather(*sends)
+
+    async def send_notification(self, message: dict):
+        """Pushes the same message to every connected socket."""
+        await self.send_to_users(
+            (user_id, message) for user_id in list(self.active_connections)
+        )
 
 
 manager = ConnectionManager()
 
 
-async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = Query(None)):
-    """WebSocket endpoint for real-time notifications"""
+# Keyed by the user being enrolled, not the admin watching
+enrollment_manager = ConnectionManager()
+
+
+def _authenticate(token: Optional[str]) -> Optional[dict]:
+    try:
+        return decode_access_token(token) if token else None
+    except HTTPException:
+        return None
+
 
-    await manager.connect(websocket)
+async def _serve(websocket: WebSocket, channel: ConnectionManager, key: int):
+    """Keeps the socket registered under `key` until the client goes away."""
+    await channel.connect(key, websocket)
 
     try:
         while True:
@@ -53,4 +82,29 @@ async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = Query(
     except Exception as e:
         pass
     finally:
-        manager.disconnect(websocket)
+        channel.disconnect(key, websocket)
+
+
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """WebSocket endpoint for real-time notifications"""
+
+    payload = _authenticate(token)
+    user_id = payload.get("user_id") if payload else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await _serve(websocket, manager, user_id)
+
+
+async def enrollment_websocket_endpoint(
+    websocket: WebSocket, user_id: int, token: Optional[str] = Query(None)
+):
+    """Admin-only: live fingerprint enrollment progress for one student"""
+
+    payload = _authenticate(token)
+    if not payload or payload.get("role") != "admin":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await _serve(websocket, enrollment_manager, user_id)
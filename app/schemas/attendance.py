@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+from app.core.config import ATTENDANCE_MAX_BATCH
+
+
+class ScanRecord(BaseModel):
+    event_id: int
+    user_id: int
+    scanned_at: datetime
+    idempotency_key: str = Field(..., min_length=1, max_length=64)
+
+
+class ScanBatch(BaseModel):
+    device_id: str = Field(..., max_length=50)
+    scans: List[ScanRecord] = Field(..., max_length=ATTENDANCE_MAX_BATCH)
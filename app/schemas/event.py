@@ -25,6 +25,20 @@ class EventResponse(EventBase):
         from_attributes = True  
 
 
+class EventSummary(BaseModel):
+    """List view projection: everything except the description."""
+
+    id: int
+    title: str
+    event_date: date
+    start_time: time
+    end_time: time
+    location: str
+
+    class Config:
+        from_attributes = True
+
+
 class EventUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
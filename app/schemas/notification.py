@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class NotificationBulkRead(BaseModel):
+    ids: Optional[List[int]] = Field(None, example=[12, 13, 15])
+    up_to_id: Optional[int] = Field(None, example=120)
+
+
+class NotificationBulkDelete(BaseModel):
+    ids: List[int] = Field(..., example=[12, 13, 15])
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import Base64Bytes, BaseModel, EmailStr, Field
+from typing import Literal, Optional
 from datetime import datetime
-from app.models.user import UserRole
+from app.models.user import Program, UserRole
 
 
 class UserCreate(BaseModel):
@@ -44,3 +44,29 @@ class UserProfileUpdate(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class EnrollmentProgress(BaseModel):
+    user_id: int
+    status: Literal["in_progress", "success", "failed"]
+    step: str
+    message: str = ""
+    device: Optional[str] = None
+    # Base64 sensor template, sent with the final "success" report
+    template: Optional[Base64Bytes] = None
+
+
+class FingerprintProbe(BaseModel):
+    template: Base64Bytes
+    device: Optional[str] = None
+
+
+class StudentImportRow(BaseModel):
+    student_id_no: str = Field(..., min_length=1, max_length=20)
+    first_name: str = Field(..., min_length=1, max_length=100)
+    last_name: str = Field(..., min_length=1, max_length=100)
+    middle_initial: Optional[str] = Field(None, max_length=5)
+    program: Program
+    email: EmailStr
+    # Without one, the student sets a password through forgot-password
+    password: Optional[str] = Field(None, min_length=1)
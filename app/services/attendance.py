@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, List
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import (
+    ATTENDANCE_FLUSH_SIZE,
+    ATTENDANCE_FLUSH_SECONDS,
+    ATTENDANCE_MAX_PENDING,
+    ATTENDANCE_RETRY_AFTER,
+)
+from app.core.database import SessionLocal
+from app.core.metrics import Histogram
+from app.models import Attendance
+from app.services.attendance_summary import (
+    new_attendance_rows,
+    record_new_attendance,
+    stored_attendance_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_ignore(db: Session):
+    """
+    Multi-row INSERT that skips rows hitting uq_attendance_event_user or
+    uq_attendance_idempotency_key, so retried uploads and repeat taps are no-ops.
+    """
+    stmt = insert(Attendance.__table__)
+    if db.get_bind().dialect.name == "sqlite":
+        return stmt.prefix_with("OR IGNORE")
+    return stmt.prefix_with("IGNORE")
+
+
+class AttendanceBuffer:
+    """
+    Collects scans from the ingest endpoint and writes them in one multi-row
+    INSERT IGNORE per flush, instead of one commit per tap.
+
+    A flush happens when flush_size scans are pending or flush_seconds after
+    the previous one, whichever comes first. Each worker process has its own
+    buffer. Scans are acknowledged once buffered; if a flush fails they are
+    put back and retried, and scanners resend anything not acknowledged,
+    which the idempotency keys make safe.
+
+    When max_pending scans are waiting, submit() answers 503 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_size: int,
+        flush_seconds: float,
+        max_pending: int,
+        retry_after: int,
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        # Serializes flushes so rows are never written twice concurrently
+        self._flush_lock = threading.Lock()
+        self._loop = None
+        self._full = None
+        self.received_total = 0
+        self.inserted_total = 0
+        self.duplicates_total = 0
+        self.flushes_total = 0
+        self.flush_failures_total = 0
+        self.flush_seconds_histogram = Histogram()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, device_id: str, scans: list) -> int:
+        """Buffers scans (ScanRecord models). Returns how many were accepted."""
+        rows = [
+            {
+                "event_id": scan.event_id,
+                "user_id": scan.user_id,
+                "device_id": device_id,
+                "idempotency_key": scan.idempotency_key,
+                "scanned_at": scan.scanned_at,
+            }
+            for scan in scans
+        ]
+        with self._lock:
+            if len(self._pending) + len(rows) > self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Attendance buffer is full, retry shortly",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending.extend(rows)
+            self.received_total += len(rows)
+            full = len(self._pending) >= self.flush_size
+
+        if full and self._full is not None:
+            self._loop.call_soon_threadsafe(self._full.set)
+        return len(rows)
+
+    def _write(self, db: Session, rows: List[dict]) -> int:
+        """
+        Inserts one batch and bumps attendance_summary in the caller's
+        transaction. Returns rows inserted.
+        """
+        fresh = new_attendance_rows(db, rows)
+        if not fresh:
+            return 0
+        inserted = max(db.execute(_insert_ignore(db), fresh).rowcount, 0)
+        if inserted < len(fresh):
+            # Another worker stored some meanwhile, or their event or user is
+            # gone; only count what this transaction wrote
+            fresh = stored_attendance_rows(db, fresh)
+        record_new_attendance(db, fresh)
+        return inserted
+
+    def flush(self) -> int:
+        """Writes everything pending in one transaction. Returns rows inserted."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                inserted = self._write(db, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    self._pending[:0] = rows
+                self.flush_failures_total += 1
+                raise
+            finally:
+                db.close()
+
+            self.flush_seconds_histogram.observe(time.perf_counter() - started)
+            self.flushes_total += 1
+            self.inserted_total += inserted
+            self.duplicates_total += len(rows) - inserted
+            return inserted
+
+    async def run(self):
+        """Background flusher, started once per worker."""
+        self._loop = asyncio.get_running_loop()
+        self._full = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+
+            try:
+                await asyncio.to_thread(self.flush)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Attendance flush failed, will retry")
+                await asyncio.sleep(self.flush_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "received_total": self.received_total,
+            "inserted_total": self.inserted_total,
+            "duplicates_total": self.duplicates_total,
+            "flushes_total": self.flushes_total,
+            "flush_failures_total": self.flush_failures_total,
+            "flush_seconds": self.flush_seconds_histogram.snapshot(),
+        }
+
+
+attendance_buffer = AttendanceBuffer(
+    session_factory=SessionLocal,
+    flush_size=ATTENDANCE_FLUSH_SIZE,
+    flush_seconds=ATTENDANCE_FLUSH_SECONDS,
+    max_pending=ATTENDANCE_MAX_PENDING,
+    retry_after=ATTENDANCE_RETRY_AFTER,
+)
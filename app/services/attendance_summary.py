@@ -0,0 +1,161 @@
+"""
+Per-event, per-program present counts in the attendance_summary table.
+
+The ingest flush calls record_new_attendance() in its own transaction, so the
+counts move together with the attendance rows. To backfill, or to repair the
+table after users were deleted or moved between programs:
+
+    python -m app.services.attendance_summary [--event-id 12]
+"""
+import argparse
+import logging
+from collections import Counter
+from typing import Optional
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models import Attendance, AttendanceSummary, User, UserRole
+
+logger = logging.getLogger(__name__)
+
+
+def _upsert_increment(db: Session, counts: Counter):
+    """Adds each (event_id, program) -> n to present_count, creating missing rows."""
+    values = [
+        {"event_id": event_id, "program": program, "present_count": n}
+        for (event_id, program), n in counts.items()
+    ]
+    table = AttendanceSummary.__table__
+    if db.get_bind().dialect.name == "sqlite":
+        stmt = sqlite.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["event_id", "program"],
+            set_={
+                "present_count": table.c.present_count + stmt.excluded.present_count
+            },
+        )
+    else:
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            present_count=table.c.present_count + stmt.inserted.present_count
+        )
+    db.execute(stmt, values)
+
+
+def new_attendance_rows(db: Session, rows: list) -> list:
+    """
+    Drops rows whose idempotency key or (event_id, user_id) is already stored,
+    or repeated earlier in the batch, so only rows that will count remain.
+    """
+    keys = {row["idempotency_key"] for row in rows}
+    pairs = {(row["event_id"], row["user_id"]) for row in rows}
+    seen_keys = set(
+        db.scalars(
+            select(Attendance.idempotency_key).where(
+                Attendance.idempotency_key.in_(keys)
+            )
+        )
+    )
+    seen_pairs = set(
+        db.execute(
+            select(Attendance.event_id, Attendance.user_id).where(
+                tuple_(Attendance.event_id, Attendance.user_id).in_(pairs)
+            )
+        ).all()
+    )
+
+    fresh = []
+    for row in rows:
+        pair = (row["event_id"], row["user_id"])
+        if row["idempotency_key"] in seen_keys or pair in seen_pairs:
+            continue
+        seen_keys.add(row["idempotency_key"])
+        seen_pairs.add(pair)
+        fresh.append(row)
+    return fresh
+
+
+def stored_attendance_rows(db: Session, rows: list) -> list:
+    """
+    Keeps the rows this transaction actually wrote, after an INSERT IGNORE
+    skipped some of them. Relies on MySQL's REPEATABLE READ snapshot: rows
+    other transactions committed since new_attendance_rows() aren't visible,
+    so they're left for the transaction that inserted them to count.
+    """
+    keys = {row["idempotency_key"] for row in rows}
+    stored = set(
+        db.execute(
+            select(Attendance.idempotency_key, Attendance.device_id).where(
+                Attendance.idempotency_key.in_(keys)
+            )
+        ).all()
+    )
+    return [
+        row for row in rows if (row["idempotency_key"], row["device_id"]) in stored
+    ]
+
+
+def record_new_attendance(db: Session, rows: list):
+    """Increments the summary for rows that were just inserted (caller commits)."""
+    if not rows:
+        return
+    user_ids = {row["user_id"] for row in rows}
+    programs = dict(
+        db.execute(
+            select(User.id, User.program).where(
+                User.id.in_(user_ids), User.role == UserRole.STUDENT
+            )
+        ).all()
+    )
+    counts = Counter(
+        (row["event_id"], programs[row["user_id"]])
+        for row in rows
+        if row["user_id"] in programs
+    )
+    if counts:
+        _upsert_increment(db, counts)
+
+
+def rebuild_attendance_summary(db: Session, event_id: Optional[int] = None) -> int:
+    """
+    Recomputes the summary from the attendance table, for one event or all of
+    them. Returns the number of summary rows written. Caller commits.
+    """
+    clear = delete(AttendanceSummary)
+    query = (
+        select(Attendance.event_id, User.program, func.count(Attendance.id))
+        .join(User, User.id == Attendance.user_id)
+        .where(User.role == UserRole.STUDENT)
+        .group_by(Attendance.event_id, User.program)
+    )
+    if event_id is not None:
+        clear = clear.where(AttendanceSummary.event_id == event_id)
+        query = query.where(Attendance.event_id == event_id)
+
+    db.execute(clear)
+    counts = Counter(
+        {(event, program): n for event, program, n in db.execute(query)}
+    )
+    if counts:
+        _upsert_increment(db, counts)
+    return len(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild attendance_summary")
+    parser.add_argument("--event-id", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        written = rebuild_attendance_summary(db, args.event_id)
+        db.commit()
+    finally:
+        db.close()
+    scope = f"event {args.event_id}" if args.event_id else "all events"
+    print(f"Rebuilt attendance summary for {scope}: {written} rows")
+
+
+if __name__ == "__main__":
+    main()
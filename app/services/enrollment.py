@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import ENROLLMENT_PROGRESS_TTL, ENROLLMENT_PUSH_GRACE_SECONDS
+from app.models.user import FingerprintStatus
+
+# What the ESP32 reports -> what we store on User.status
+SENSOR_STATUS_MAP = {
+    "in_progress": FingerprintStatus.PENDING.value,
+    "success": FingerprintStatus.ENROLLED.value,
+    "failed": FingerprintStatus.FAILED.value,
+}
+
+# Step the server records itself when it asks the sensor to start enrolling
+STARTED_STEP = "started"
+
+# Last progress report per user, filled on every worker by the broadcast relay.
+# Values are (monotonic time received, progress).
+_latest_progress = TTLCache(ttl=ENROLLMENT_PROGRESS_TTL, maxsize=1000)
+
+
+def record_progress(progress: dict):
+    _latest_progress.set(progress["user_id"], (time.monotonic(), progress))
+
+
+def latest_progress(user_id: int) -> Optional[dict]:
+    """
+    Latest pushed progress for the user. The server's own "started" marker
+    only counts for ENROLLMENT_PUSH_GRACE_SECONDS; if the sensor hasn't
+    pushed anything by then, None is returned so the caller polls it.
+    """
+    entry = _latest_progress.get(user_id)
+    if entry is None:
+        return None
+    received_at, progress = entry
+    if (
+        progress["step"] == STARTED_STEP
+        and time.monotonic() - received_at > ENROLLMENT_PUSH_GRACE_SECONDS
+    ):
+        return None
+    return progress
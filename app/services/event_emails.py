@@ -0,0 +1,140 @@
+from html import escape
+from string import Template
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import EMAIL_FANOUT_CHUNK_SIZE
+from app.core.mail import enqueue_emails
+from app.models import Event, OutboxEmail, User, UserRole
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _literal(text: str) -> str:
+    """HTML-escapes event text and doubles $ so Template leaves it as-is."""
+    return escape(text).replace("$", "$$")
+
+
+def render_event_template(event: Event) -> tuple:
+    """
+    Renders the reminder once per event. Only $first_name is left to fill in
+    per recipient, so personalizing is a single cheap substitution.
+    Returns (subject, body_template).
+    """
+    starts_at = event.start_time.strftime("%I:%M %p")
+    subject = f"Reminder: {event.title} starts at {starts_at}"
+    body = Template(
+        "<p>Hi $first_name,</p>"
+        f"<p><b>{_literal(event.title)}</b> starts at {starts_at} on "
+        f"{event.event_date.strftime('%B %d, %Y')} at {_literal(event.location)}.</p>"
+        f"<p>{_literal(event.description or '')}</p>"
+        "<p>Don't forget to scan your fingerprint at the entrance.</p>"
+    )
+    return subject, body
+
+
+def build_event_emails(
+    event_id: int, subject: str, body: Template, recipients
+) -> list:
+    """recipients: iterable of (email, first_name) rows."""
+    return [
+        {
+            "to_email": email,
+            "subject": subject,
+            "body": body.substitute(first_name=escape(first_name)),
+            "event_id": event_id,
+        }
+        for email, first_name in recipients
+    ]
+
+
+def _recipient_chunks(db: Session, user_ids=None):
+    """
+    Yields recipient rows in chunks of EMAIL_FANOUT_CHUNK_SIZE, either for the
+    students among the given user ids or, when None, for every student by
+    keyset on id.
+    """
+    columns = (User.email, User.first_name)
+
+    if user_ids is not None:
+        for start in range(0, len(user_ids), EMAIL_FANOUT_CHUNK_SIZE):
+            chunk = user_ids[start : start + EMAIL_FANOUT_CHUNK_SIZE]
+            yield (
+                db.query(*columns)
+                .filter(User.role == UserRole.STUDENT, User.id.in_(chunk))
+                .all()
+            )
+        return
+
+    last_id = 0
+    while True:
+        rows = (
+            db.query(User.id, *columns)
+            .filter(User.role == UserRole.STUDENT, User.id > last_id)
+            .order_by(User.id)
+            .limit(EMAIL_FANOUT_CHUNK_SIZE)
+            .all()
+        )
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield [(row.email, row.first_name) for row in rows]
+
+
+def queue_event_emails(db: Session, event: Event, user_ids: list) -> int:
+    """
+    Queues reminders for the students among user_ids without committing, so
+    they land in the same transaction as the notifications that triggered them.
+    """
+    subject, body = render_event_template(event)
+    queued = 0
+    for recipients in _recipient_chunks(db, user_ids):
+        queued += enqueue_emails(
+            db, build_event_emails(event.id, subject, body, recipients)
+        )
+    return queued
+
+
+def fan_out_event_emails(
+    db: Session, event: Event, user_ids=None, dry_run: bool = False
+) -> int:
+    """
+    Queues one reminder email per recipient into the outbox, a chunk at a time
+    so memory stays flat and the mail worker can start sending immediately.
+
+    user_ids limits the fan-out to those users (e.g. the ones that just got the
+    in-app notification); None means every student. With dry_run the emails
+    are rendered but not queued.
+
+    Returns the number of emails queued (or rendered, for a dry run).
+    """
+    subject, body = render_event_template(event)
+
+    queued = 0
+    for recipients in _recipient_chunks(db, user_ids):
+        messages = build_event_emails(event.id, subject, body, recipients)
+        if not dry_run:
+            enqueue_emails(db, messages)
+            db.commit()
+        queued += len(messages)
+
+    action = "Rendered" if dry_run else "Queued"
+    logger.info(f"{action} {queued} reminder emails for event {event.id}")
+    return queued
+
+
+def get_event_email_progress(db: Session, event_id: int) -> dict:
+    """Outbox status counts for one event's reminder emails."""
+    counts = dict(
+        db.query(OutboxEmail.status, func.count(OutboxEmail.id))
+        .filter(OutboxEmail.event_id == event_id)
+        .group_by(OutboxEmail.status)
+        .all()
+    )
+    return {
+        "event_id": event_id,
+        "queued": sum(counts.values()),
+        "pending": counts.get("pending", 0),
+        "sent": counts.get("sent", 0),
+        "failed": counts.get("failed", 0),
+    }
@@ -0,0 +1,195 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+from sqlalchemy.sql import Select
+from app.core.config import EXPORT_CHUNK_SIZE
+from app.core.database import SessionLocal
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def stream_rows(statement: Select, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator:
+    """
+    Yields result rows through a server-side cursor, chunk_size at a time.
+    Opens its own session because it's consumed while the response is being
+    sent, after the request's dependencies have been torn down.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            statement.execution_options(yield_per=chunk_size, stream_results=True)
+        )
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+
+# Spreadsheet apps evaluate text starting with these as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell_value(value):
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Names and emails are user-supplied; keep them as plain text
+        return "'" + value
+    return value
+
+
+def csv_stream(
+    header: Sequence[str], rows: Iterable, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encodes rows as CSV, yielding one block of bytes per chunk_size rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(header)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_cell_value(value) for value in row])
+        if count % chunk_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# ------------------ XLSX ------------------
+class _ChunkSink:
+    """Write-only, non-seekable file for ZipFile; bytes are drained by the caller."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+# Control characters XML 1.0 doesn't allow, even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value) -> str:
+    value = _cell_value(value)
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def xlsx_stream(
+    header: Sequence[str],
+    rows: Iterable,
+    sheet_name: str = "Sheet1",
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Builds a single-sheet workbook incrementally. The worksheet is written
+    into the zip as a stream (inline strings, no shared string table), and the
+    compressed bytes are yielded every chunk_size rows.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/>'
+            "</sheets></workbook>",
+        )
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/'
+                b'spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode("utf-8"))
+
+            parts = []
+            for count, row in enumerate(rows, start=1):
+                parts.append(_xlsx_row(row))
+                if count % chunk_size == 0:
+                    sheet.write("".join(parts).encode("utf-8"))
+                    parts.clear()
+                    yield sink.drain()
+
+            sheet.write("".join(parts).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+
+def export_stream(
+    export_format: str, header: Sequence[str], rows: Iterable, sheet_name: str
+) -> Iterator[bytes]:
+    if export_format == "xlsx":
+        return xlsx_stream(header, rows, sheet_name)
+    return csv_stream(header, rows)
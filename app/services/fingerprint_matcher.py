@@ -0,0 +1,219 @@
+import asyncio
+import threading
+import logging
+from typing import Callable, Optional, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import (
+    FINGERPRINT_TEMPLATE_BYTES,
+    FINGERPRINT_MATCH_THRESHOLD,
+    FINGERPRINT_SIMILARITY,
+)
+from app.models import Fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Scores every row of `templates` (n, d) against `probe` (d,) in one pass.
+# Higher is more similar; the best score is compared to the match threshold.
+Similarity = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def hamming_similarity(templates: np.ndarray, probe: np.ndarray) -> np.ndarray:
+    """Fraction of identical bits, 1.0 for an exact copy of the template."""
+    # XOR and popcount 64 bits at a time; rows are padded to a multiple of 8 bytes
+    differing = np.bitwise_count(
+        np.bitwise_xor(templates.view(np.uint64), probe.view(np.uint64))
+    ).sum(axis=1, dtype=np.uint32)
+    return 1.0 - differing / (templates.shape[1] * 8)
+
+
+def cosine_similarity(templates: np.ndarray, probe: np.ndarray) -> np.ndarray:
+    """Cosine of the angle between the raw template bytes."""
+    matrix = templates.astype(np.float32)
+    vector = probe.astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    return np.divide(
+        matrix @ vector, norms, out=np.zeros(len(matrix), np.float32), where=norms > 0
+    )
+
+
+SIMILARITIES = {
+    "hamming": hamming_similarity,
+    "cosine": cosine_similarity,
+}
+
+
+class FingerprintMatcher:
+    """
+    1:N identification over every enrolled template, held in memory.
+
+    Templates live in one contiguous (capacity, row_bytes) uint8 array that
+    doubles when full, with rows zero-padded to a multiple of 8 bytes, so a
+    probe is scored against the whole population with a single vectorized
+    call. Rows are keyed by Fingerprint.id; removing one moves the last row
+    into its slot to keep the live rows contiguous.
+
+    load() reads the fingerprints table once. After that, enroll and delete
+    keep it in sync through add() and remove_user().
+
+    The lock is a threading.Lock that async code also takes, so it is only
+    ever held for in-memory work, never across database I/O.
+    """
+
+    def __init__(
+        self,
+        template_bytes: int,
+        threshold: float,
+        similarity: Similarity = hamming_similarity,
+        capacity: int = 1024,
+    ):
+        self.template_bytes = template_bytes
+        self.row_bytes = -(-template_bytes // 8) * 8
+        self.threshold = threshold
+        self.similarity = similarity
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = None  # asyncio.Lock, created on first ensure_loaded()
+        self._loading = False
+        self._backlog = []  # add/remove calls that arrive while load() runs
+        self._templates = np.zeros((capacity, self.row_bytes), dtype=np.uint8)
+        self._user_ids = np.zeros(capacity, dtype=np.int64)
+        self._fingerprint_ids = np.zeros(capacity, dtype=np.int64)
+        self._rows = {}  # fingerprint_id -> row
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _as_vector(self, template: bytes) -> np.ndarray:
+        """Sensor templates are fixed size; pad or trim anything that isn't."""
+        vector = np.zeros(self.row_bytes, dtype=np.uint8)
+        raw = np.frombuffer(template[: self.template_bytes], dtype=np.uint8)
+        vector[: len(raw)] = raw
+        return vector
+
+    def _grow(self):
+        capacity = max(len(self._templates) * 2, 1)
+        templates = np.zeros((capacity, self.row_bytes), dtype=np.uint8)
+        templates[: self._count] = self._templates[: self._count]
+        self._templates = templates
+        self._user_ids = np.resize(self._user_ids, capacity)
+        self._fingerprint_ids = np.resize(self._fingerprint_ids, capacity)
+
+    def _add(self, fingerprint_id: int, user_id: int, template: bytes):
+        row = self._rows.get(fingerprint_id)
+        if row is None:
+            if self._count == len(self._templates):
+                self._grow()
+            row = self._count
+            self._count += 1
+            self._rows[fingerprint_id] = row
+        self._templates[row] = self._as_vector(template)
+        self._user_ids[row] = user_id
+        self._fingerprint_ids[row] = fingerprint_id
+
+    def _remove_row(self, row: int):
+        last = self._count - 1
+        del self._rows[int(self._fingerprint_ids[row])]
+        if row != last:
+            self._templates[row] = self._templates[last]
+            self._user_ids[row] = self._user_ids[last]
+            self._fingerprint_ids[row] = self._fingerprint_ids[last]
+            self._rows[int(self._fingerprint_ids[row])] = row
+        self._count = last
+
+    def load(self, db: Session) -> int:
+        """
+        Reads every template into a staging matcher without holding the lock,
+        then swaps it in. Changes made meanwhile are replayed on top.
+        """
+        with self._lock:
+            self._loading = True
+            self._backlog = []
+
+        try:
+            staging = FingerprintMatcher(
+                self.template_bytes, self.threshold, self.similarity
+            )
+            rows = db.query(
+                Fingerprint.id, Fingerprint.user_id, Fingerprint.fingerprint_template
+            ).yield_per(1000)
+            for fingerprint_id, user_id, template in rows:
+                staging._add(fingerprint_id, user_id, template)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._backlog = []
+            raise
+
+        with self._lock:
+            self._templates = staging._templates
+            self._user_ids = staging._user_ids
+            self._fingerprint_ids = staging._fingerprint_ids
+            self._rows = staging._rows
+            self._count = staging._count
+            for op, *args in self._backlog:
+                if op == "add":
+                    self._add(*args)
+                else:
+                    self._remove_user(*args)
+            self._backlog = []
+            self._loading = False
+            self.loaded = True
+            count = self._count
+
+        logger.info(f"Fingerprint matcher loaded {count} templates")
+        return count
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Single-flight cold load: concurrent callers wait for one load()."""
+        if self.loaded:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if not self.loaded:
+                await db.run_sync(self.load)
+
+    def add(self, fingerprint_id: int, user_id: int, template: bytes):
+        with self._lock:
+            if self.loaded:
+                self._add(fingerprint_id, user_id, template)
+            elif self._loading:
+                self._backlog.append(("add", fingerprint_id, user_id, template))
+
+    def _remove_user(self, user_id: int) -> int:
+        rows = np.flatnonzero(self._user_ids[: self._count] == user_id)
+        # Highest row first so swapped-in rows are never ones still to remove
+        for row in sorted(rows.tolist(), reverse=True):
+            self._remove_row(row)
+        return len(rows)
+
+    def remove_user(self, user_id: int) -> int:
+        with self._lock:
+            if self._loading and not self.loaded:
+                self._backlog.append(("remove", user_id))
+            return self._remove_user(user_id)
+
+    def identify(self, template: bytes) -> Optional[Tuple[int, float]]:
+        """Returns (user_id, score) of the best match above threshold, else None."""
+        probe = self._as_vector(template)
+        with self._lock:
+            if self._count == 0:
+                return None
+            scores = self.similarity(self._templates[: self._count], probe)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            user_id = int(self._user_ids[best])
+
+        if score < self.threshold:
+            return None
+        return user_id, score
+
+
+fingerprint_matcher = FingerprintMatcher(
+    template_bytes=FINGERPRINT_TEMPLATE_BYTES,
+    threshold=FINGERPRINT_MATCH_THRESHOLD,
+    similarity=SIMILARITIES[FINGERPRINT_SIMILARITY],
+)
@@ -0,0 +1,126 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models import Notification, Event
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDedupeCache:
+    """
+    Remembers which (event_id, user_id) pairs already have an "event" notification.
+
+    Keys are stored as a set of integer user ids per event rather than one
+    string per pair. Every event carries an expiry (its start time); once it
+    passes, all keys for that event are dropped. When the total number of
+    keys exceeds max_entries, the events expiring soonest are evicted first.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._events = {}  # event_id -> (expires_at, set of user ids)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self._size
+
+    def contains(self, event_id: int, user_id: int) -> bool:
+        entry = self._events.get(event_id)
+        if entry is not None and user_id in entry[1]:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add_many(self, event_id: int, expires_at: datetime, user_ids):
+        entry = self._events.get(event_id)
+        if entry is None or entry[0] != expires_at:
+            if entry is not None:
+                self._size -= len(entry[1])
+            entry = (expires_at, set())
+            self._events[event_id] = entry
+
+        before = len(entry[1])
+        entry[1].update(user_ids)
+        self._size += len(entry[1]) - before
+
+        self._enforce_cap(keep=event_id)
+
+    def discard_event(self, event_id: int):
+        entry = self._events.pop(event_id, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def purge_expired(self, now: datetime = None) -> int:
+        """Drops every event whose start time has passed. Returns keys removed."""
+        now = now or datetime.now()
+        removed = 0
+        for event_id in [e for e, (exp, _) in self._events.items() if exp <= now]:
+            removed += len(self._events[event_id][1])
+            self.discard_event(event_id)
+        return removed
+
+    def _enforce_cap(self, keep: int):
+        if self._size <= self.max_entries:
+            return
+        by_expiry = sorted(
+            (exp, event_id) for event_id, (exp, _) in self._events.items()
+        )
+        for _, event_id in by_expiry:
+            if self._size <= self.max_entries:
+                break
+            if event_id == keep:
+                continue
+            self.evictions += len(self._events[event_id][1])
+            self.discard_event(event_id)
+
+    def clear(self) -> int:
+        count = self._size
+        self._events.clear()
+        self._size = 0
+        return count
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._events),
+            "size": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def warm(self, db: Session, now: datetime = None) -> int:
+        """
+        Loads existing "event" notifications for events that haven't started yet,
+        so a restarted worker doesn't have to rediscover every pair.
+        """
+        now = now or datetime.now()
+        rows = (
+            db.query(
+                Notification.event_id,
+                Notification.user_id,
+                Event.event_date,
+                Event.start_time,
+            )
+            .join(Event, Event.id == Notification.event_id)
+            .filter(Notification.type == "event", Event.event_date >= now.date())
+            .order_by(Notification.event_id)
+            .all()
+        )
+
+        grouped = {}
+        for event_id, user_id, event_date, start_time in rows:
+            expires_at = datetime.combine(event_date, start_time)
+            if expires_at <= now:
+                continue
+            grouped.setdefault((event_id, expires_at), []).append(user_id)
+
+        for (event_id, expires_at), user_ids in grouped.items():
+            self.add_many(event_id, expires_at, user_ids)
+
+        logger.info(f"Notification cache warmed with {self._size} entries")
+        return self._size
@@ -1,103 +1,205 @@
 from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from app.core.config import (
+    NOTIFICATION_INSERT_CHUNK_SIZE,
+    NOTIFICATION_CACHE_MAX_ENTRIES,
+)
 from app.models import Notification, Event, User
+from app.services.event_emails import queue_event_emails
+from app.services.notification_cache import NotificationDedupeCache
 import logging
 
 logger = logging.getLogger(__name__)
 
-_sent_notifications = set()
+_sent_notifications = NotificationDedupeCache(max_entries=NOTIFICATION_CACHE_MAX_ENTRIES)
 
 
-def notify_today_events(db: Session):
+def _insert_ignore(db: Session):
     """
-    Check for events happening today and create notifications.
-    Uses in-memory cache and database constraints to prevent duplicates.
-
-    NOTE: This is now a SYNC function (no async) since we removed WebSocket.
+    Multi-row INSERT that silently skips rows hitting uq_user_event_notification.
+    MySQL spells it INSERT IGNORE, SQLite spells it INSERT OR IGNORE.
     """
-    now = datetime.now()
-    today = now.date()
+    stmt = insert(Notification.__table__)
+    if db.get_bind().dialect.name == "sqlite":
+        return stmt.prefix_with("OR IGNORE")
+    return stmt.prefix_with("IGNORE")
 
-    events_today = db.query(Event).filter(Event.event_date == today).all()
-    if not events_today:
-        return
 
-    users = db.query(User).all()
+def _uncached_recipients(db: Session, event: Event) -> list:
+    """
+    Every user the dedupe cache doesn't already know has this event's
+    notification. Only these are checked against the notifications table.
+    """
+    return [
+        user_id
+        for user_id in db.scalars(select(User.id).order_by(User.id))
+        if not _sent_notifications.contains(event.id, user_id)
+    ]
+
+
+def notification_payload(n) -> dict:
+    """JSON shape shared by GET /notifications/ and the WebSocket push."""
+    return {
+        "id": n.id,
+        "user_id": n.user_id,
+        "event_id": n.event_id,
+        "title": n.title,
+        "message": n.message,
+        "type": n.type,
+        "is_read": n.is_read,
+        "timestamp": n.timestamp.isoformat() if n.timestamp else None,
+    }
+
+
+def _lock_existing(db: Session, event: Event, user_ids: list) -> set:
+    """
+    Users in user_ids that already have this event's notification. The
+    locking read also blocks other transactions from inserting those keys
+    until commit, so every row _load_created() finds afterwards is ours.
+    """
+    return set(
+        db.scalars(
+            select(Notification.user_id)
+            .where(
+                Notification.event_id == event.id,
+                Notification.type == "event",
+                Notification.user_id.in_(user_ids),
+            )
+            .with_for_update()
+        )
+    )
+
+
+def _load_created(db: Session, event: Event, user_ids: list) -> list:
+    """Payloads of the rows just inserted for user_ids (see _lock_existing)."""
+    rows = db.execute(
+        select(
+            Notification.id,
+            Notification.user_id,
+            Notification.event_id,
+            Notification.title,
+            Notification.message,
+            Notification.type,
+            Notification.is_read,
+            Notification.timestamp,
+        ).where(
+            Notification.event_id == event.id,
+            Notification.type == "event",
+            Notification.user_id.in_(user_ids),
+        )
+    )
+    return [notification_payload(row) for row in rows]
+
+
+def fan_out_event_notifications(
+    db: Session,
+    event: Event,
+    created: Optional[list] = None,
+    send_emails: bool = False,
+) -> int:
+    """
+    Create the "event" notification for every user that doesn't have one yet.
 
-    for event in events_today:
-        event_datetime = datetime.combine(event.event_date, event.start_time)
-        current_datetime = datetime.now()
-        time_diff = (event_datetime - current_datetime).total_seconds()
+    Users the dedupe cache already knows about are skipped without touching
+    the notifications table. The rest are checked a chunk at a time with one
+    locking IN query and written in multi-row INSERT IGNORE batches inside a
+    single transaction. The uq_user_event_notification constraint stays the
+    final guard against duplicates (e.g. another worker fanning out the same
+    event).
 
-        if not (0 < time_diff <= 120):
-            continue
+    If a `created` list is passed, the payload of every row written by this
+    call is appended to it so the caller can push them to connected clients.
 
-        for user in users:
-            notification_key = f"event_{event.id}_user_{user.id}"
+    With send_emails, a reminder email is queued in the outbox for every
+    student notified, in the same transaction: either both are written or,
+    on failure, neither is and the whole fan-out can be retried.
 
-            if notification_key in _sent_notifications:
-                logger.debug(
-                    f"Skipping duplicate notification (cached): {notification_key}"
-                )
+    Returns the number of rows actually inserted.
+    """
+    user_ids = _uncached_recipients(db, event)
+    if not user_ids:
+        return 0
+
+    message = (
+        f"{event.description}\n\n"
+        f"Starts at {event.start_time.strftime('%I:%M %p')}"
+    )
+    stmt = _insert_ignore(db)
+
+    inserted = 0
+    already_sent = 0
+    try:
+        for start in range(0, len(user_ids), NOTIFICATION_INSERT_CHUNK_SIZE):
+            chunk = user_ids[start : start + NOTIFICATION_INSERT_CHUNK_SIZE]
+            # Skips rows stored before (or while) this fan-out ran
+            existing = _lock_existing(db, event, chunk)
+            already_sent += len(existing)
+            chunk = [user_id for user_id in chunk if user_id not in existing]
+            if not chunk:
                 continue
-
-            existing = (
-                db.query(Notification)
-                .filter(
-                    Notification.user_id == user.id,
-                    Notification.event_id == event.id,
-                    Notification.type == "event",
-                )
-                .first()
+            result = db.execute(
+                stmt,
+                [
+                    {
+                        "user_id": user_id,
+                        "event_id": event.id,
+                        "title": event.title,
+                        "message": message,
+                        "type": "event",
+                        "is_read": False,
+                    }
+                    for user_id in chunk
+                ],
             )
+            inserted += max(result.rowcount, 0)
+            if created is not None or send_emails:
+                rows = _load_created(db, event, chunk)
+                if created is not None:
+                    created.extend(rows)
+                if send_emails:
+                    queue_event_emails(db, event, [n["user_id"] for n in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-            if existing:
-                _sent_notifications.add(notification_key)
-                logger.debug(f"Notification already exists in DB: {notification_key}")
-                continue
+    _sent_notifications.add_many(
+        event.id, datetime.combine(event.event_date, event.start_time), user_ids
+    )
+
+    skipped = len(user_ids) - already_sent - inserted
+    if skipped:
+        logger.warning(
+            f"{skipped} duplicate notifications prevented by DB constraint for event {event.id}"
+        )
+    logger.info(f"Created {inserted} notifications for event {event.id}")
+
+    return inserted
 
-            notification = Notification(
-                user_id=user.id,
-                event_id=event.id,
-                title=event.title,
-                message=(
-                    f"{event.description}\n\n"
-                    f"Starts at {event.start_time.strftime('%I:%M %p')}"
-                ),
-                type="event",
-                is_read=False,
-            )
 
-            try:
-                db.add(notification)
-                db.commit()
-                db.refresh(notification)
+def warm_notification_cache(db: Session) -> int:
+    """Loads pending (event, user) pairs from the notifications table on startup."""
+    return _sent_notifications.warm(db)
 
-                _sent_notifications.add(notification_key)
 
-                logger.info(
-                    f"Created notification {notification.id} for user {user.id}, event {event.id}"
-                )
+def expire_notification_cache() -> int:
+    """Drops cached keys for every event that has already started."""
+    removed = _sent_notifications.purge_expired()
+    if removed:
+        logger.debug(f"Notification cache expired {removed} entries")
+    return removed
 
-            except IntegrityError as e:
-                db.rollback()
-                _sent_notifications.add(notification_key)
-                logger.warning(
-                    f"Duplicate notification prevented by DB constraint: {notification_key}"
-                )
 
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Failed to create notification: {e}")
+def notification_cache_stats() -> dict:
+    return _sent_notifications.stats()
 
 
 def clear_notification_cache():
     """
     Clear the in-memory notification cache.
-    Call this at midnight or when you want to allow notifications to be resent.
+    Call this when you want to allow notifications to be resent.
     """
-    global _sent_notifications
-    count = len(_sent_notifications)
-    _sent_notifications.clear()
+    count = _sent_notifications.clear()
     logger.info(f"Notification cache cleared ({count} entries removed)")
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from typing import Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import (
+    SENSOR_DEVICES,
+    SENSOR_TIMEOUT_SECONDS,
+    SENSOR_MAX_CONCURRENCY,
+    SENSOR_FAILURE_THRESHOLD,
+    SENSOR_RESET_SECONDS,
+)
+from app.core.metrics import Histogram
+import logging
+
+logger = logging.getLogger(__name__)
+
+SENSOR_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+
+class SensorUnavailableError(Exception):
+    """Raised without touching the network while a sensor's circuit is open."""
+
+
+class SensorClient:
+    """
+    One long-lived keep-alive HTTP client per ESP32 device.
+
+    Requests are capped at `max_concurrency` in flight. After
+    `failure_threshold` consecutive failures the circuit opens and calls fail
+    immediately for `reset_seconds`; after that exactly one call is let
+    through as a probe, and the rest keep failing fast until it succeeds
+    (closing the circuit) or fails (reopening it).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float = SENSOR_TIMEOUT_SECONDS,
+        max_concurrency: int = SENSOR_MAX_CONCURRENCY,
+        failure_threshold: int = SENSOR_FAILURE_THRESHOLD,
+        reset_seconds: float = SENSOR_RESET_SECONDS,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.latency = Histogram(SENSOR_LATENCY_BUCKETS)
+        self.requests_total = 0
+        self.errors_total = 0
+        self.rejected_total = 0
+
+    @property
+    def circuit_state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def _record_failure(self):
+        self.errors_total += 1
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"Sensor '{self.name}' circuit opened")
+            self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        if self._opened_at is not None:
+            logger.info(f"Sensor '{self.name}' circuit closed")
+        self._failures = 0
+        self._opened_at = None
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        state = self.circuit_state
+        if state == "open" or (state == "half_open" and self._probing):
+            self.rejected_total += 1
+            raise SensorUnavailableError(f"Sensor '{self.name}' is unavailable")
+
+        # No await between the check and here, so only one caller gets the probe
+        probe = state == "half_open"
+        if probe:
+            self._probing = True
+        try:
+            async with self._semaphore:
+                self.requests_total += 1
+                started = time.perf_counter()
+                try:
+                    response = await self.client.request(method, path, **kwargs)
+                    response.raise_for_status()
+                except Exception:
+                    self._record_failure()
+                    raise
+                finally:
+                    self.latency.observe(time.perf_counter() - started)
+
+            self._record_success()
+            return response
+        finally:
+            if probe:
+                self._probing = False
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "circuit": self.circuit_state,
+            "consecutive_failures": self._failures,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "rejected_total": self.rejected_total,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+class SensorRegistry:
+    """Device name -> SensorClient, built lazily from SENSOR_DEVICES."""
+
+    def __init__(self, devices: Dict[str, str]):
+        self.devices = devices
+        self._clients: Dict[str, SensorClient] = {}
+
+    @property
+    def default_device(self) -> str:
+        return next(iter(self.devices))
+
+    def get(self, name: Optional[str] = None) -> SensorClient:
+        name = name or self.default_device
+        if name not in self.devices:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown fingerprint sensor '{name}'",
+            )
+        client = self._clients.get(name)
+        if client is None:
+            client = self._clients[name] = SensorClient(name, self.devices[name])
+        return client
+
+    def stats(self) -> dict:
+        return {name: client.stats() for name, client in self._clients.items()}
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.client.aclose()
+        self._clients.clear()
+
+
+sensors = SensorRegistry(SENSOR_DEVICES)
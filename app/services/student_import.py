@@ -0,0 +1,271 @@
+import csv
+import io
+import json
+import logging
+import secrets
+from typing import IO, Iterator, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS
+from app.core.password_hasher import HasherOverloadedError, password_hasher
+from app.models.user import User, UserRole, FingerprintStatus
+from app.schemas.user import StudentImportRow
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson", "json")
+
+
+# ------------------ Readers ------------------
+# Each yields (row number, raw record) without loading the whole upload.
+def _iter_csv(source: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    for row_number, record in enumerate(csv.DictReader(text), start=1):
+        # Empty cells mean "not given", same as a missing JSON key
+        yield row_number, {
+            key: value
+            for key, value in record.items()
+            if key and value not in ("", None)
+        }
+
+
+def _iter_ndjson(source: IO[bytes]) -> Iterator[Tuple[int, dict]]:
+    for row_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            # One bad line shouldn't sink the rest of the file
+            yield row_number, e
+
+
+def _iter_json_array(
+    source: IO[bytes], block_size: int = 65536
+) -> Iterator[Tuple[int, dict]]:
+    """Decodes one element of a top-level JSON array at a time."""
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(source, encoding="utf-8-sig")
+    buffer = ""
+    position = 0
+    started = False
+    row_number = 0
+
+    while True:
+        block = text.read(block_size)
+        buffer = buffer[position:] + block
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array of students")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not block:
+                    raise
+                break  # element continues in the next block
+            row_number += 1
+            position = end
+            yield row_number, record
+
+        if not block:
+            raise ValueError("Unterminated JSON array")
+
+
+READERS = {"csv": _iter_csv, "ndjson": _iter_ndjson, "json": _iter_json_array}
+
+
+# ------------------ Import ------------------
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._last_failed_row = None
+        self.not_processed = 0
+        self.resume_from_row = None
+        self.aborted = None
+
+    def error(self, row_number: int, message: str, field: str = None):
+        # A row can fail on several fields; errors for one row arrive together
+        if row_number != self._last_failed_row:
+            self.failed += 1
+            self._last_failed_row = row_number
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "field": field, "error": message})
+
+    def skip(self, row_number: int):
+        """A row that was neither created nor rejected because the import stopped."""
+        self.not_processed += 1
+        if self.resume_from_row is None or row_number < self.resume_from_row:
+            self.resume_from_row = row_number
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            # Validation errors are found before uniqueness errors of earlier rows
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": len(self.errors) >= self.max_errors,
+            # Set when the import stopped early; every row before resume_from_row
+            # was created or rejected, none after it was created
+            "aborted": self.aborted,
+            "not_processed": self.not_processed,
+            "resume_from_row": self.resume_from_row,
+        }
+
+
+def _validate(record, row_number: int, report: ImportReport):
+    if isinstance(record, ValueError):
+        report.error(row_number, f"Invalid JSON: {record}")
+        return None
+    if not isinstance(record, dict):
+        report.error(row_number, "Expected an object")
+        return None
+    try:
+        return StudentImportRow.model_validate(record)
+    except ValidationError as e:
+        for issue in e.errors():
+            field = ".".join(str(part) for part in issue["loc"]) or None
+            report.error(row_number, issue["msg"], field)
+        return None
+
+
+def _user_row(student: StudentImportRow, hashed: str) -> dict:
+    return {
+        "student_id_no": student.student_id_no,
+        "first_name": student.first_name,
+        "last_name": student.last_name,
+        "middle_initial": student.middle_initial,
+        "program": student.program,
+        "email": student.email,
+        "password": hashed,
+        "role": UserRole.STUDENT,
+        "status": FingerprintStatus.NOT_ENROLLED.value,
+    }
+
+
+def _import_chunk(db: Session, chunk: list, report: ImportReport):
+    """
+    chunk is a list of (row number, StudentImportRow). Uniqueness is checked
+    with one IN query per column against the database and a set against the
+    rest of the chunk; the survivors are hashed together and inserted in one
+    multi-row INSERT.
+    """
+    emails = {student.email for _, student in chunk}
+    student_ids = {student.student_id_no for _, student in chunk}
+    taken_emails = {
+        email.lower()
+        for email in db.scalars(select(User.email).where(User.email.in_(emails)))
+    }
+    taken_ids = set(
+        db.scalars(
+            select(User.student_id_no).where(User.student_id_no.in_(student_ids))
+        )
+    )
+
+    accepted = []
+    for row_number, student in chunk:
+        email = student.email.lower()
+        if email in taken_emails:
+            report.error(row_number, "Email already registered", "email")
+        elif student.student_id_no in taken_ids:
+            report.error(
+                row_number, "Student ID already registered", "student_id_no"
+            )
+        else:
+            taken_emails.add(email)
+            taken_ids.add(student.student_id_no)
+            accepted.append((row_number, student))
+    if not accepted:
+        return
+
+    try:
+        hashes = password_hasher.hash_many(
+            [student.password or secrets.token_urlsafe(24) for _, student in accepted]
+        )
+    except HasherOverloadedError:
+        for row_number, _ in accepted:
+            report.skip(row_number)
+        raise
+    rows = [
+        _user_row(student, hashed) for (_, student), hashed in zip(accepted, hashes)
+    ]
+
+    try:
+        db.execute(insert(User.__table__), rows)
+        db.commit()
+        report.created += len(rows)
+    except IntegrityError:
+        # Someone registered one of these meanwhile; find which, row by row
+        db.rollback()
+        for (row_number, _), row in zip(accepted, rows):
+            try:
+                db.execute(insert(User.__table__), [row])
+                db.commit()
+                report.created += 1
+            except IntegrityError:
+                db.rollback()
+                report.error(row_number, "Email or student ID already registered")
+
+
+def import_students(
+    db: Session, source: IO[bytes], fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> dict:
+    """
+    Validates and inserts students from a CSV, NDJSON or JSON-array upload,
+    chunk_size rows at a time. Every rejected row is listed in the report with
+    its 1-based row number; valid rows are committed per chunk.
+
+    If the password hasher is overloaded the import stops there: chunks
+    already committed stay, and the report counts the rows left unprocessed.
+    """
+    report = ImportReport(IMPORT_MAX_ERRORS)
+    records = READERS[fmt](source)
+    chunk = []
+    try:
+        try:
+            for row_number, record in records:
+                report.received += 1
+                student = _validate(record, row_number, report)
+                if student is not None:
+                    chunk.append((row_number, student))
+                if len(chunk) >= chunk_size:
+                    _import_chunk(db, chunk, report)
+                    chunk = []
+        except (ValueError, csv.Error) as e:
+            # Malformed file: keep what was imported, report where parsing stopped
+            report.error(report.received + 1, f"Could not parse {fmt} input: {e}")
+        if chunk:
+            _import_chunk(db, chunk, report)
+    except HasherOverloadedError as e:
+        report.aborted = e.detail
+        # Count the rest of the upload so the client knows what to resend
+        try:
+            for row_number, _ in records:
+                report.received += 1
+                report.skip(row_number)
+        except (ValueError, csv.Error):
+            pass
+
+    logger.info(
+        f"Student import: {report.created} created, {report.failed} rejected "
+        f"of {report.received}"
+    )
+    return report.as_dict()
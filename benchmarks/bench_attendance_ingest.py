@@ -0,0 +1,153 @@
+"""
+Scans per second through the attendance ingest buffer.
+
+    python -m benchmarks.bench_attendance_ingest [--scans 20000] [--scanners 8]
+
+Simulates `--scanners` ESP32 devices uploading batches of `--batch` scans
+into an AttendanceBuffer backed by a temporary SQLite database. One batch in
+ten is uploaded twice, as a retrying scanner would. The clock stops when
+every scan is committed. A one-commit-per-scan baseline is run for comparison.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Attendance, Event, Program, User
+from app.models.password_reset import PasswordReset  # noqa: F401 (mapper)
+from app.schemas.attendance import ScanRecord
+from app.services.attendance import AttendanceBuffer
+
+
+def setup(path: str, students: int) -> sessionmaker:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.execute(
+        User.__table__.insert(),
+        [
+            {
+                "first_name": f"Student{i}",
+                "last_name": "Bench",
+                "program": Program.BSIT.name,
+                "role": "STUDENT",
+                "email": f"student{i}@example.com",
+                "password": "x",
+                "status": "enrolled",
+            }
+            for i in range(students)
+        ],
+    )
+    db.add(
+        Event(
+            id=1,
+            title="Foundation Day",
+            event_date=date(2026, 1, 1),
+            start_time=dtime(8, 0),
+            end_time=dtime(12, 0),
+            location="Gymnasium",
+            created_by=1,
+        )
+    )
+    db.commit()
+    db.close()
+    return factory
+
+
+def scans_for(count: int) -> list:
+    now = datetime.now()
+    return [
+        ScanRecord(
+            event_id=1, user_id=i + 1, scanned_at=now, idempotency_key=f"scan-{i}"
+        )
+        for i in range(count)
+    ]
+
+
+def baseline(factory: sessionmaker, scans: list) -> float:
+    started = time.perf_counter()
+    for scan in scans:
+        db = factory()
+        db.add(
+            Attendance(
+                event_id=scan.event_id,
+                user_id=scan.user_id,
+                device_id="bench",
+                idempotency_key=scan.idempotency_key,
+                scanned_at=scan.scanned_at,
+            )
+        )
+        db.commit()
+        db.close()
+    return len(scans) / (time.perf_counter() - started)
+
+
+async def buffered(factory: sessionmaker, scans: list, scanners: int, batch: int):
+    buffer = AttendanceBuffer(
+        session_factory=factory,
+        flush_size=1000,
+        flush_seconds=0.2,
+        max_pending=len(scans) * 2,
+        retry_after=1,
+    )
+    flusher = asyncio.create_task(buffer.run())
+    await asyncio.sleep(0)
+
+    batches = [scans[i : i + batch] for i in range(0, len(scans), batch)]
+    uploads = batches + batches[::10]
+
+    def upload(chunk):
+        buffer.submit("bench", chunk)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scanners) as pool:
+        await asyncio.gather(
+            *(asyncio.wrap_future(pool.submit(upload, chunk)) for chunk in uploads)
+        )
+    while buffer.inserted_total + buffer.duplicates_total < buffer.received_total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    flusher.cancel()
+    return buffer, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scans", type=int, default=20000)
+    parser.add_argument("--scanners", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--baseline-scans", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = setup(os.path.join(tmp, "baseline.db"), args.baseline_scans)
+        rate = baseline(factory, scans_for(args.baseline_scans))
+        print(f"one commit per scan: {rate:>10,.0f} scans/s")
+
+        factory = setup(os.path.join(tmp, "buffered.db"), args.scans)
+        buffer, elapsed = asyncio.run(
+            buffered(factory, scans_for(args.scans), args.scanners, args.batch)
+        )
+        print(
+            f"buffered ingest:     {buffer.received_total / elapsed:>10,.0f} scans/s "
+            f"({buffer.flushes_total} flushes, "
+            f"{buffer.duplicates_total} retried scans ignored)"
+        )
+
+        db = factory()
+        stored = db.query(func.count(Attendance.id)).scalar()
+        db.close()
+        assert stored == args.scans, stored
+
+
+if __name__ == "__main__":
+    main()
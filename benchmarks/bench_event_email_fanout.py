@@ -0,0 +1,87 @@
+"""
+Dry-run throughput of the event reminder email fan-out.
+
+    python -m benchmarks.bench_event_email_fanout [--students 20000]
+
+Renders the event template once and personalizes it for every student, then
+repeats the full fan-out (render + multi-row INSERT into the outbox) against an
+in-memory SQLite database. No SMTP server is contacted.
+"""
+import argparse
+import time
+from datetime import date, time as dtime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Event, OutboxEmail, Program, User
+from app.models.password_reset import PasswordReset  # noqa: F401 (mapper)
+from app.services.event_emails import (
+    build_event_emails,
+    fan_out_event_emails,
+    render_event_template,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    db.execute(
+        User.__table__.insert(),
+        [
+            {
+                "first_name": f"Student{i}",
+                "last_name": "Bench",
+                "program": Program.BSIT.name,
+                "role": "STUDENT",
+                "email": f"student{i}@example.com",
+                "password": "x",
+                "status": "not_enrolled",
+            }
+            for i in range(args.students)
+        ],
+    )
+    event = Event(
+        id=1,
+        title="Foundation Day",
+        description="Assembly at the gym",
+        event_date=date(2026, 1, 1),
+        start_time=dtime(8, 0),
+        end_time=dtime(12, 0),
+        location="Gymnasium",
+        created_by=1,
+    )
+    db.add(event)
+    db.commit()
+
+    recipients = [
+        (f"student{i}@example.com", f"Student{i}") for i in range(args.students)
+    ]
+
+    started = time.perf_counter()
+    subject, body = render_event_template(event)
+    messages = build_event_emails(event.id, subject, body, recipients)
+    elapsed = time.perf_counter() - started
+    print(f"render only:      {len(messages) / elapsed:>12,.0f} emails/s")
+
+    started = time.perf_counter()
+    queued = fan_out_event_emails(db, event, dry_run=True)
+    elapsed = time.perf_counter() - started
+    print(f"dry-run fan-out:  {queued / elapsed:>12,.0f} emails/s")
+
+    started = time.perf_counter()
+    queued = fan_out_event_emails(db, event)
+    elapsed = time.perf_counter() - started
+    print(f"queue to outbox:  {queued / elapsed:>12,.0f} emails/s")
+    assert db.query(OutboxEmail).count() == args.students
+
+
+if __name__ == "__main__":
+    main()
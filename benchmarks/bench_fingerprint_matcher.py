@@ -0,0 +1,65 @@
+"""
+1:N identification latency of the in-memory fingerprint matcher.
+
+    python -m benchmarks.bench_fingerprint_matcher [--sizes 1000,10000,50000] [--probes 200]
+
+Fills a matcher with random templates for each population size, then times
+`--probes` identifications of noisy copies of enrolled templates, per
+similarity function. Reports median/p95 latency and the match rate.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.core.config import FINGERPRINT_TEMPLATE_BYTES, FINGERPRINT_MATCH_THRESHOLD
+from app.services.fingerprint_matcher import FingerprintMatcher, SIMILARITIES
+
+
+def run(size: int, probes: int, similarity, rng) -> tuple:
+    matcher = FingerprintMatcher(
+        template_bytes=FINGERPRINT_TEMPLATE_BYTES,
+        threshold=FINGERPRINT_MATCH_THRESHOLD,
+        similarity=similarity,
+    )
+    matcher.loaded = True
+    templates = rng.integers(
+        0, 256, (size, FINGERPRINT_TEMPLATE_BYTES), dtype=np.uint8
+    )
+    for i, template in enumerate(templates):
+        matcher.add(i, i, template.tobytes())
+
+    timings = []
+    matched = 0
+    for user_id in rng.integers(0, size, probes):
+        probe = templates[user_id].copy()
+        # Flip a few bytes so probes are close to, not identical to, the template
+        noisy = rng.integers(0, FINGERPRINT_TEMPLATE_BYTES, 8)
+        probe[noisy] = rng.integers(0, 256, len(noisy), dtype=np.uint8)
+
+        started = time.perf_counter()
+        match = matcher.identify(probe.tobytes())
+        timings.append(time.perf_counter() - started)
+        matched += match is not None and match[0] == user_id
+
+    timings = np.array(timings) * 1000
+    return np.median(timings), np.percentile(timings, 95), matched / probes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,5000,10000,20000,50000")
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"template={FINGERPRINT_TEMPLATE_BYTES} bytes, {args.probes} probes per run")
+    print(f"{'similarity':>10} {'templates':>10} {'p50 ms':>8} {'p95 ms':>8} {'matched':>8}")
+    for name, similarity in SIMILARITIES.items():
+        for size in (int(s) for s in args.sizes.split(",")):
+            p50, p95, rate = run(size, args.probes, similarity, rng)
+            print(f"{name:>10} {size:>10} {p50:>8.2f} {p95:>8.2f} {rate:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
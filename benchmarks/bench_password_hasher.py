@@ -0,0 +1,66 @@
+"""
+Login throughput of the process-pool password hasher.
+
+    python -m benchmarks.bench_password_hasher [--logins 200] [--rounds 12]
+
+Verifies one password `--logins` times from a pool of request threads, once per
+pool size from 1 up to the number of cores, and reports logins/s and logins/s
+per core.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.core.password_hasher import PasswordHasher
+
+
+def run(workers: int, logins: int, rounds: int) -> float:
+    hasher = PasswordHasher(
+        workers=workers, max_pending=logins, rounds=rounds, retry_after=1
+    )
+    hashed = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt(rounds)).decode()
+
+    # Warm the pool so process start-up isn't measured
+    list(
+        ThreadPoolExecutor(workers).map(
+            lambda _: hasher.verify("benchmark-password", hashed), range(workers)
+        )
+    )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=40) as requests:
+        results = list(
+            requests.map(
+                lambda _: hasher.verify("benchmark-password", hashed), range(logins)
+            )
+        )
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"bcrypt cost={args.rounds}, {args.logins} logins per run")
+    print(f"{'workers':>8} {'logins/s':>10} {'per core':>10}")
+    workers = 1
+    while True:
+        rate = run(workers, args.logins, args.rounds)
+        print(f"{workers:>8} {rate:>10.1f} {rate / workers:>10.1f}")
+        if workers >= args.max_workers:
+            break
+        workers = min(workers * 2, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()